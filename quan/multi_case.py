@@ -2,7 +2,10 @@ import xml.etree.ElementTree as ET  # For parsing and editing XML files (like .r
 import os  # For handling file system operations
 import shutil  # For copying files and directories
 import subprocess  # For running external commands (like starting SUMO)
+import sys  # For finding the shared tools
 import pandas as pd  # For processing and saving tabular data (CSV)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))  # path to the tools directory
+from emissions import sum_emissions  # Streaming emission aggregation
 
 # Define paths to base input files
 NETWORK_FILE = "simpleT.net.xml"  # The road network file
@@ -87,20 +90,12 @@ def parse_emissions(emission_path):
     if not os.path.exists(emission_path):
         print(f"⚠️ File not found: {emission_path}")
         return None
-    tree = ET.parse(emission_path)
-    root = tree.getroot()
+    sums = sum_emissions(emission_path, ["CO2", "CO", "NOx", "PMx", "fuel"]) # Stream through the file once
     totals = {
-        "CO2 (g)": 0, "CO (g)": 0,
-        "NOx (g)": 0, "PMx (g)": 0,
-        "Fuel (L)": 0
+        "CO2 (g)": sums["CO2"], "CO (g)": sums["CO"],
+        "NOx (g)": sums["NOx"], "PMx (g)": sums["PMx"],
+        "Fuel (L)": sums["fuel"]
     }
-    for timestep in root.findall("timestep"):
-        for vehicle in timestep.findall("vehicle"):
-            totals["CO2 (g)"] += float(vehicle.get("CO2", 0))
-            totals["CO (g)"] += float(vehicle.get("CO", 0))
-            totals["NOx (g)"] += float(vehicle.get("NOx", 0))
-            totals["PMx (g)"] += float(vehicle.get("PMx", 0))
-            totals["Fuel (L)"] += float(vehicle.get("fuel", 0))
     return pd.DataFrame([totals])
 
 # ✅ Save DataFrame to CSV
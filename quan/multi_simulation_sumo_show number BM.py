@@ -1,8 +1,11 @@
 import xml.etree.ElementTree as ET
 import os
 import subprocess
+import sys
 import pandas as pd
 import time
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))  # path to the tools directory
+from emissions import sum_emission_totals
 
 
 def get_total_vehicles(root, vehicle_types):
@@ -74,28 +77,8 @@ def parse_emission_data(emission_file):
         print(f"❌ No emission data found for {emission_file}. Skipping...")
         return None
 
-    tree = ET.parse(emission_file)
-    root = tree.getroot()
-
-    # Initialize total sums
-    total_emissions = {
-        "Total CO2 (g)": 0,
-        "Total CO (g)": 0,
-        "Total HC (g)": 0,
-        "Total NOx (g)": 0,
-        "Total PMx (g)": 0,
-        "Total Fuel (L)": 0
-    }
-
-    # Extract and sum emissions
-    for timestep in root.findall("timestep"):
-        for vehicle in timestep.findall("vehicle"):
-            total_emissions["Total CO2 (g)"] += float(vehicle.get("CO2", 0))
-            total_emissions["Total CO (g)"] += float(vehicle.get("CO", 0))
-            total_emissions["Total HC (g)"] += float(vehicle.get("HC", 0))
-            total_emissions["Total NOx (g)"] += float(vehicle.get("NOx", 0))
-            total_emissions["Total PMx (g)"] += float(vehicle.get("PMx", 0))
-            total_emissions["Total Fuel (L)"] += float(vehicle.get("fuel", 0))
+    # Sum emissions in a single streaming pass
+    total_emissions = sum_emission_totals(emission_file)
 
     # Convert to DataFrame
     df = pd.DataFrame([total_emissions])
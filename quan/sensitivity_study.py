@@ -2,16 +2,15 @@
 sobol sensitivity analysis"""
 
 
-import csv
-import subprocess
+import os
 import sys
-import numpy as np
+from functools import partial
 
 
 sys.path.append('/Users/byronmason/Code/sim_SUMO/tools')  #path to the tools directory
 from experimental_design import sobol_sensitivity
-from random_route import generate_route_file_defined_routes
-from sumo_interface import run_sumo_simulation, parse_emission_data
+from random_route import build_route_cache, generate_route_file_defined_routes
+from sweep import run_sweep
 
 
 TOTAL_VEHICLES = 1000
@@ -21,7 +20,8 @@ ROUTE_FILE = "./complex_juntion.rou.xml"
 # TRIP_FILE = "./complex_juntion.trips.xml"
 SIMULATION_DURATION = 3600
 RESULTS_FILE = "./sensitivity_results.csv"
-EMISSION_FILE = "./emissions_data.xml"
+WORK_DIR = "./sweep"
+WORKERS = os.cpu_count()
 # EDGES = ["L7", "L8"]  # should be defined if required
 
 
@@ -76,59 +76,40 @@ VEHICLE_ROUTES = {
    
 #    return source, sink
 
-# generate the vehicle proportions for the sensitivity study
-vehicle_counts = sobol_sensitivity(total_vehicles=TOTAL_VEHICLES)
+def generate_routes(route_file, vehicle_proportions, route_cache):
+    """generate routed vehicles based on the possible vehicle routes"""
 
-# simulation loop
-for index, vehicle_proportions in enumerate(vehicle_counts):
-
-    # generate and write output_file for random routes according to the network
-    # including ALL edges
-    # generate_trip_file(
-    #     net_file=NET_FILE,
-    #     route_file=ROUTE_FILE,
-    #     total_vehicles=TOTAL_VEHICLES,
-    #     duration=SIMULATION_DURATION,
-    #     vehicle_proportions=vehicle_proportions)
-
-    # generate trip file using random sink to source routing *based on possible vehicle routes*
+    # generate route file using random sink to source routing *based on possible vehicle routes*,
+    # the routes are taken from the cache so duarouter is not needed
     generate_route_file_defined_routes(
-        route_file=ROUTE_FILE,
+        route_file=route_file,
         total_vehicles=TOTAL_VEHICLES,
         duration=SIMULATION_DURATION,
         vehicle_proportions=vehicle_proportions,
-        vehicle_routes=VEHICLE_ROUTES)
-    
-   # generate trip file using random sink to source routing
-   #  generate_route_file_sink_to_source(
-   #      net_file=NET_FILE,
-   #      route_file=ROUTE_FILE,
-   #      total_vehicles=TOTAL_VEHICLES,
-   #      duration=SIMULATION_DURATION,
-   #      vehicle_proportions=vehicle_proportions)
-
-    # generate route file from trip file
-    command = [
-        'duarouter',
-        '--verbose', 'true',
-         '--net-file',  NET_FILE, 
-         '--trip-files', ROUTE_FILE, 
-         '--output-file', ROUTE_FILE]
-
-    subprocess.run(command, check=True)
-
-    # run simulation
-    print("Running simulation; ", index)
-    run_sumo_simulation(config_file=CONFIG_FILE)
-
-    # parse emissions
-    emissions = parse_emission_data(emission_file=EMISSION_FILE)
-
-    # save results
-    # header = ['pkw', 'bus', 'scooter', 'bike', 'Total CO2 (mg)', 
-    # 'Total CO mg)', 'Total HC (mg)', 'Total NOx (mg)', 'Total PMx (mg)', 'Total Fuel (mg)']
-    combined = np.concatenate((vehicle_proportions, + emissions.values[0]))
+        vehicle_routes=VEHICLE_ROUTES,
+        route_cache=route_cache)
+
 
-    with open(RESULTS_FILE, mode='a', encoding="utf-8") as file:
-        writer = csv.writer(file)
-        writer.writerow(combined)
+if __name__ == "__main__":
+
+    # compute the route of every source/sink pair once
+    route_cache = build_route_cache(net_file=NET_FILE, vehicle_routes=VEHICLE_ROUTES)
+
+    # generate the vehicle proportions for the sensitivity study
+    vehicle_counts = sobol_sensitivity(total_vehicles=TOTAL_VEHICLES)
+
+    # run the design points in parallel, each worker in its own sandbox directory,
+    # and save results in design order
+    # header = ['pkw', 'bus', 'scooter', 'bike', 'Total CO2 (mg)',
+    # 'Total CO mg)', 'Total HC (mg)', 'Total NOx (mg)', 'Total PMx (mg)', 'Total Fuel (mg)']
+    run_sweep(
+        design=vehicle_counts,
+        generate_routes=partial(generate_routes, route_cache=route_cache),
+        config_file=CONFIG_FILE,
+        results_file=RESULTS_FILE,
+        workers=WORKERS,
+        work_dir=WORK_DIR,
+        extra_key={"generator": generate_route_file_defined_routes.__name__,
+                   "total_vehicles": TOTAL_VEHICLES, "duration": SIMULATION_DURATION,
+                   "vehicle_routes": VEHICLE_ROUTES},
+        input_files=[NET_FILE])
@@ -1,7 +1,10 @@
 import xml.etree.ElementTree as ET
 import os
 import subprocess
+import sys
 import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))  # path to the tools directory
+from emissions import sum_emissions
 
 # 🛠 Định nghĩa đường dẫn đến các file đầu vào
 NETWORK_FILE = "simpleT.net.xml"
@@ -102,25 +105,15 @@ def parse_emission_data(emission_file):
         print(f"❌ No emission data found for {emission_file}. Skipping...")
         return None
 
-    tree = ET.parse(emission_file)
-    root = tree.getroot()
-
+    totals = sum_emissions(emission_file, ["CO2", "CO", "NOx", "PMx", "fuel"])
     total_emissions = {
-        "CO2 (g)": 0,
-        "CO (g)": 0,
-        "NOx (g)": 0,
-        "PMx (g)": 0,
-        "Fuel (L)": 0
+        "CO2 (g)": totals["CO2"],
+        "CO (g)": totals["CO"],
+        "NOx (g)": totals["NOx"],
+        "PMx (g)": totals["PMx"],
+        "Fuel (L)": totals["fuel"]
     }
 
-    for timestep in root.findall("timestep"):
-        for vehicle in timestep.findall("vehicle"):
-            total_emissions["CO2 (g)"] += float(vehicle.get("CO2", 0))
-            total_emissions["CO (g)"] += float(vehicle.get("CO", 0))
-            total_emissions["NOx (g)"] += float(vehicle.get("NOx", 0))
-            total_emissions["PMx (g)"] += float(vehicle.get("PMx", 0))
-            total_emissions["Fuel (L)"] += float(vehicle.get("fuel", 0))
-
     df = pd.DataFrame([total_emissions])
     return df
 
@@ -1,6 +1,8 @@
-import xml.etree.ElementTree as ET
 import pandas as pd
 import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))  # path to the tools directory
+from emissions import sum_emission_totals
 
 def sum_total_emissions(xml_file, csv_output="emissions_data_scenario3.csv"):
     # Check if file exists
@@ -8,29 +10,8 @@ def sum_total_emissions(xml_file, csv_output="emissions_data_scenario3.csv"):
         print(f"Error: {xml_file} not found. Ensure SUMO has generated emission data.")
         return None
 
-    # Parse XML
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-
-    # Initialize total sums
-    total_emissions = {
-        "Total CO2 (g)": 0,
-        "Total CO (g)": 0,
-        "Total HC (g)": 0,
-        "Total NOx (g)": 0,
-        "Total PMx (g)": 0,
-        "Total Fuel (L)": 0
-    }
-
-    # Extract and sum emissions
-    for timestep in root.findall("timestep"):
-        for vehicle in timestep.findall("vehicle"):
-            total_emissions["Total CO2 (g)"] += float(vehicle.get("CO2", 0))
-            total_emissions["Total CO (g)"] += float(vehicle.get("CO", 0))
-            total_emissions["Total HC (g)"] += float(vehicle.get("HC", 0))
-            total_emissions["Total NOx (g)"] += float(vehicle.get("NOx", 0))
-            total_emissions["Total PMx (g)"] += float(vehicle.get("PMx", 0))
-            total_emissions["Total Fuel (L)"] += float(vehicle.get("fuel", 0))
+    # Sum emissions in a single streaming pass
+    total_emissions = sum_emission_totals(xml_file)
 
     # Convert to DataFrame
     df = pd.DataFrame([total_emissions])
@@ -1,29 +1,23 @@
-import xml.etree.ElementTree as ET
 import pandas as pd
 
+from emissions import iter_vehicle_emissions
 
 
 
 
 def sumo_xml_to_csv(xml_file, csv_file):
-    # Parse XML
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
-
-    # Extract data
+    # Extract data while streaming through the XML
     data = []
-    for timestep in root.findall("timestep"):
-        time = float(timestep.get("time"))
-        for vehicle in timestep.findall("vehicle"):
-            vid = vehicle.get("id")
-            co2 = float(vehicle.get("CO2", 0))
-            co = float(vehicle.get("CO", 0))
-            nox = float(vehicle.get("NOx", 0))
-            pmx = float(vehicle.get("PMx", 0))
-            fuel = float(vehicle.get("fuel", 0))
-            speed = float(vehicle.get("speed", 0))
-            
-            data.append([time, vid, co2, co, nox, pmx, fuel, speed])
+    for time, vehicle in iter_vehicle_emissions(xml_file):
+        vid = vehicle.get("id")
+        co2 = float(vehicle.get("CO2", 0))
+        co = float(vehicle.get("CO", 0))
+        nox = float(vehicle.get("NOx", 0))
+        pmx = float(vehicle.get("PMx", 0))
+        fuel = float(vehicle.get("fuel", 0))
+        speed = float(vehicle.get("speed", 0))
+        
+        data.append([time, vid, co2, co, nox, pmx, fuel, speed])
 
     # Convert to DataFrame
     df = pd.DataFrame(data, columns=["Time", "Vehicle", "CO2 (g/s)", "CO (g/s)", "NOx (g/s)", "PMx (g/s)", "Fuel (L/s)", "Speed (m/s)"])
@@ -0,0 +1,99 @@
+"""Streaming aggregation of SUMO emission output
+
+The emission file is read with iterparse and every timestep is cleared once it
+has been processed, so memory does not grow with the length of the simulation.
+"""
+
+import math
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+
+# emission attributes summed by default
+EMISSION_ATTRS = ["CO2", "CO", "HC", "NOx", "PMx", "fuel"]
+
+# column names used for the summed emissions in the results files
+TOTAL_COLUMNS = {
+    "CO2": "Total CO2 (g)",
+    "CO": "Total CO (g)",
+    "HC": "Total HC (g)",
+    "NOx": "Total NOx (g)",
+    "PMx": "Total PMx (g)",
+    "fuel": "Total Fuel (L)"
+}
+
+
+def iter_vehicle_emissions(emission_file):
+    """yield (time, vehicle attributes) for every vehicle in every timestep of an emission file
+
+    emission_file may be a file name or a file object. The attribute dict is only valid
+    until the next item is requested.
+    """
+    context = ET.iterparse(emission_file, events=("start", "end"))
+    _, root = next(context)
+    time = None
+    for event, elem in context:
+        if event == "start":
+            if elem.tag == "timestep":
+                time = float(elem.get("time"))
+        elif elem.tag == "vehicle":
+            yield time, elem.attrib
+        elif elem.tag == "timestep":
+            # drop the finished timestep (and its vehicles) from the tree
+            root.clear()
+
+def sum_emissions(emission_file, attrs=None):
+    """sum the given emission attributes over all vehicles and timesteps in a single pass"""
+    if attrs is None:
+        attrs = EMISSION_ATTRS
+    totals = dict.fromkeys(attrs, 0.)
+    for _, vehicle in iter_vehicle_emissions(emission_file):
+        for attr in attrs:
+            totals[attr] += float(vehicle.get(attr, 0))
+    return totals
+
+def sum_emission_totals(emission_file):
+    """sum all emission attributes, keyed by the column names used for the results files"""
+    totals = sum_emissions(emission_file, list(TOTAL_COLUMNS))
+    return {column: totals[attr] for attr, column in TOTAL_COLUMNS.items()}
+
+def _group_key_functions(group_by, time_bin):
+    """functions computing the value of each group-by column from (time, vehicle attributes)"""
+    key_functions = {
+        # vehicle type as encoded in the generated vehicle ids, e.g. pkw_12
+        "vtype": lambda time, vehicle: vehicle.get("id", "").rsplit("_", 1)[0],
+        "type": lambda time, vehicle: vehicle.get("type"),
+        "lane": lambda time, vehicle: vehicle.get("lane"),
+        "edge": lambda time, vehicle: vehicle.get("lane", "").rsplit("_", 1)[0],
+        "time": lambda time, vehicle: math.floor(time / time_bin) * time_bin,
+    }
+    for column in group_by:
+        if column not in key_functions:
+            raise ValueError(f"Unknown group-by column: {column}, use one of {list(key_functions)}")
+    return [key_functions[column] for column in group_by]
+
+def aggregate_emissions(emission_file, group_by=("vtype",), attrs=None, time_bin=60.):
+    """sum emissions per group in a single pass and return them as a tidy DataFrame
+
+    group_by is a sequence of "vtype" (prefix of the vehicle id), "type" (type attribute),
+    "lane", "edge" and "time" (start of the time bin of length time_bin seconds).
+    The result has one row per group with the group-by columns, the number of
+    vehicle records ("count") and the summed attributes.
+    """
+    if attrs is None:
+        attrs = EMISSION_ATTRS
+    group_by = list(group_by)
+    key_functions = _group_key_functions(group_by, time_bin)
+    groups = {}
+    for time, vehicle in iter_vehicle_emissions(emission_file):
+        key = tuple(key_function(time, vehicle) for key_function in key_functions)
+        sums = groups.get(key)
+        if sums is None:
+            sums = groups[key] = [0] + [0.] * len(attrs)
+        sums[0] += 1
+        for i, attr in enumerate(attrs, 1):
+            sums[i] += float(vehicle.get(attr, 0))
+    df = pd.DataFrame([key + tuple(sums) for key, sums in groups.items()],
+                      columns=group_by + ["count"] + list(attrs))
+    return df.sort_values(group_by, ignore_index=True)
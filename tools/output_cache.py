@@ -0,0 +1,235 @@
+"""Columnar binary cache for SUMO XML outputs (emission, FCD and tripinfo)
+
+An output file is converted once into one .npy file per column (or a single
+Parquet file when pyarrow is available and requested). String columns such as
+vehicle ids are dictionary encoded as integer codes plus a list of categories.
+Reloading memory-maps the columns instead of parsing the XML again.
+"""
+
+import json
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+
+# root element -> (element carrying the time, element of a record)
+OUTPUT_KINDS = {
+    "emission-export": ("timestep", "vehicle"),
+    "fcd-export": ("timestep", "vehicle"),
+    "tripinfos": (None, "tripinfo"),
+}
+
+META_FILE = "meta.json"
+PARQUET_FILE = "data.parquet"
+CHUNK_SIZE = 1 << 20
+
+
+def iter_output_records(xml_file):
+    """yield a flat attribute dict for every record of an emission, FCD or tripinfo output
+
+    Records below a timestep get its time as "time", attributes of child elements
+    (e.g. the emissions of a tripinfo) are prefixed with the child name.
+    """
+    context = ET.iterparse(xml_file, events=("start", "end"))
+    _, root = next(context)
+    if root.tag not in OUTPUT_KINDS:
+        raise ValueError(f"Unsupported SUMO output with root element: {root.tag}")
+    time_tag, record_tag = OUTPUT_KINDS[root.tag]
+    time = None
+    for event, elem in context:
+        if event == "start":
+            if elem.tag == time_tag:
+                time = elem.get("time")
+        elif elem.tag == record_tag:
+            record = {} if time_tag is None else {"time": time}
+            record.update(elem.attrib)
+            for child in elem:
+                for key, value in child.attrib.items():
+                    record[f"{child.tag}_{key}"] = value
+            yield record
+            if time_tag is None:
+                root.clear()
+        elif elem.tag == time_tag:
+            root.clear()
+
+
+class _TypeChanged(Exception):
+    """raised when a column already stored as numbers turns out to hold strings"""
+
+    def __init__(self, name):
+        Exception.__init__(self, name)
+        self.name = name
+
+
+class _Column:
+    """collects the raw values of a column and converts them chunk by chunk"""
+
+    def __init__(self, name, start_row, numeric=True):
+        self.name = name
+        self.numeric = numeric
+        self.chunks = []
+        self.categories = {}
+        self.values = [None] * start_row
+
+    def flush(self):
+        values = self.values
+        self.values = []
+        if self.numeric:
+            try:
+                self.chunks.append(np.array([np.nan if v is None or v == "" else v for v in values], dtype=float))
+                return
+            except ValueError:
+                # the raw strings of earlier chunks are gone, the caller has to read the file again
+                if self.chunks:
+                    raise _TypeChanged(self.name)
+                self.numeric = False
+        self.chunks.append(self._encode(values))
+
+    def _encode(self, values):
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            codes[i] = -1 if value is None else self.categories.setdefault(value, len(self.categories))
+        return codes
+
+    def array(self):
+        if not self.chunks:
+            return np.empty(0, dtype=float if self.numeric else np.int32)
+        return np.concatenate(self.chunks)
+
+
+def _read_columns(xml_file, string_columns):
+    """read all records of xml_file into columns, the given columns are always stored as strings"""
+    columns = {}
+    rows = 0
+    for record in iter_output_records(xml_file):
+        for name in record:
+            if name not in columns:
+                columns[name] = _Column(name, rows % CHUNK_SIZE, name not in string_columns)
+        for column in columns.values():
+            column.values.append(record.get(column.name))
+        rows += 1
+        if rows % CHUNK_SIZE == 0:
+            for column in columns.values():
+                column.flush()
+    if rows % CHUNK_SIZE:
+        for column in columns.values():
+            column.flush()
+    return columns, rows
+
+
+def convert_output(xml_file, cache_dir=None, fmt="npy"):
+    """convert a SUMO output into a columnar cache directory and return its path
+
+    fmt is "npy" (one memory-mappable .npy file per column) or "parquet" (requires pyarrow).
+    """
+    if fmt == "parquet" and not HAVE_PYARROW:
+        raise ImportError("Writing Parquet requires pyarrow")
+    if cache_dir is None:
+        cache_dir = xml_file + ".cache"
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # a column which looked numeric in the first chunks but holds strings later is
+    # read again as strings, so ids like "007" or "1e3" keep their original text
+    string_columns = set()
+    while True:
+        try:
+            columns, rows = _read_columns(xml_file, string_columns)
+            break
+        except _TypeChanged as e:
+            string_columns.add(e.name)
+
+    # columns which first appeared in a later chunk are padded at the front
+    arrays = {}
+    for name, column in columns.items():
+        array = column.array()
+        missing = rows - len(array)
+        if missing:
+            fill = np.full(missing, np.nan) if column.numeric else np.full(missing, -1, dtype=np.int32)
+            array = np.concatenate((fill, array))
+        arrays[name] = array
+
+    meta = {
+        "source": os.path.abspath(xml_file),
+        "source_size": os.path.getsize(xml_file),
+        "source_mtime": os.path.getmtime(xml_file),
+        "format": fmt,
+        "rows": rows,
+        "columns": list(columns),
+        "categories": {name: list(column.categories) for name, column in columns.items() if not column.numeric},
+    }
+
+    if fmt == "parquet":
+        table = pa.table({name: (pa.DictionaryArray.from_arrays(
+            pa.array(arrays[name], mask=arrays[name] < 0), meta["categories"][name])
+            if name in meta["categories"] else arrays[name]) for name in columns})
+        pq.write_table(table, os.path.join(cache_dir, PARQUET_FILE))
+    else:
+        for index, name in enumerate(columns):
+            np.save(os.path.join(cache_dir, f"{index:03d}.npy"), arrays[name])
+
+    with open(os.path.join(cache_dir, META_FILE), "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+    print(f"Converted {rows} records of {xml_file} to {cache_dir}")
+    return cache_dir
+
+def is_cache_valid(xml_file, cache_dir, fmt=None):
+    """check whether cache_dir holds a conversion of the current version of xml_file
+    (in the given format "npy" or "parquet" unless fmt is None)"""
+    meta_file = os.path.join(cache_dir, META_FILE)
+    if not os.path.exists(meta_file):
+        return False
+    with open(meta_file, encoding="utf-8") as file:
+        meta = json.load(file)
+    return (meta["source_size"] == os.path.getsize(xml_file) and
+            meta["source_mtime"] == os.path.getmtime(xml_file) and
+            (fmt is None or meta["format"] == fmt))
+
+def load_columns(cache_dir, columns=None):
+    """memory-map the columns of a .npy cache
+
+    Returns a dict column -> array and a dict column -> categories for the
+    dictionary encoded string columns (codes of -1 denote missing values).
+    """
+    with open(os.path.join(cache_dir, META_FILE), encoding="utf-8") as file:
+        meta = json.load(file)
+    if meta["format"] != "npy":
+        raise ValueError(f"Only npy caches can be memory-mapped, {cache_dir} is {meta['format']}")
+    arrays = {}
+    for index, name in enumerate(meta["columns"]):
+        if columns is None or name in columns:
+            arrays[name] = np.load(os.path.join(cache_dir, f"{index:03d}.npy"), mmap_mode="r")
+    categories = {name: values for name, values in meta["categories"].items() if name in arrays}
+    return arrays, categories
+
+def load_output(cache_dir, columns=None):
+    """load a cached SUMO output as DataFrame, string columns become pandas categoricals"""
+    with open(os.path.join(cache_dir, META_FILE), encoding="utf-8") as file:
+        meta = json.load(file)
+    if meta["format"] == "parquet":
+        return pq.read_table(os.path.join(cache_dir, PARQUET_FILE), columns=columns,
+                             memory_map=True).to_pandas()
+    arrays, categories = load_columns(cache_dir, columns)
+    data = {}
+    for name, array in arrays.items():
+        if name in categories:
+            data[name] = pd.Categorical.from_codes(array, categories[name])
+        else:
+            data[name] = array
+    return pd.DataFrame(data, copy=False)
+
+def read_output(xml_file, cache_dir=None, columns=None, fmt="npy"):
+    """load a SUMO output through its columnar cache, converting it first if needed"""
+    if cache_dir is None:
+        cache_dir = xml_file + ".cache"
+    if not is_cache_valid(xml_file, cache_dir, fmt):
+        convert_output(xml_file, cache_dir, fmt)
+    return load_output(cache_dir, columns)
@@ -1,9 +1,18 @@
 import random
+import re
 import xml.etree.ElementTree as ET
 import matplotlib.pyplot as plt
 import numpy as np
 import sumolib
 
+# Define vehicle types
+VEHICLE_TYPES = {
+    "pkw": {"id": "pkw", "accel": "2.6", "decel": "4.5", "sigma": "0.5", "length": "4.5", "maxSpeed": "50"},
+    "bus": {"id": "bus", "accel": "1.0", "decel": "3.0", "sigma": "0.5", "length": "12.0", "maxSpeed": "25"},
+    "scooter": {"id": "scooter", "accel": "3.0", "decel": "4.5", "sigma": "0.5", "length": "2.0", "maxSpeed": "40"},
+    "bike": {"id": "bike", "accel": "2.0", "decel": "4.0", "sigma": "0.5", "length": "1.8", "maxSpeed": "15"}
+}
+
 def get_edges_from_net(net_file):  #this needs to be changed to work with selected edges to better represent traffic across a junction
     """find edges for a given route .net file"""
     tree = ET.parse(net_file)
@@ -77,34 +86,146 @@ def generate_trips(num_vehicles, duration, proportions, *args):
             })
     return trips
 
-def write_rou_file(filename, trips):
-    """Write trips to a .rou.xml file with vehicle type definitions."""
-    root = ET.Element("routes")
+def default_rng():
+    """numpy generator seeded from the random module, so random.seed also controls the vectorized generators"""
+    return np.random.default_rng(random.getrandbits(64))
 
-    # Define vehicle types
-    vehicle_types = {
-        "pkw": {"id": "pkw", "accel": "2.6", "decel": "4.5", "sigma": "0.5", "length": "4.5", "maxSpeed": "50"},
-        "bus": {"id": "bus", "accel": "1.0", "decel": "3.0", "sigma": "0.5", "length": "12.0", "maxSpeed": "25"},
-        "scooter": {"id": "scooter", "accel": "3.0", "decel": "4.5", "sigma": "0.5", "length": "2.0", "maxSpeed": "40"},
-        "bike": {"id": "bike", "accel": "2.0", "decel": "4.0", "sigma": "0.5", "length": "1.8", "maxSpeed": "15"}
-    }
+def _trip_dtype(types, edges):
+    """structured dtype for trip arrays holding the given vehicle type and edge ids"""
+    type_len = max((len(t) for t in types), default=1)
+    edge_len = max((len(e) for e in edges), default=1)
+    return np.dtype([("index", np.int64), ("type", f"U{type_len}"), ("depart", np.float64),
+                     ("from", f"U{edge_len}"), ("to", f"U{edge_len}")])
 
-    for vtype in vehicle_types.values():
-        ET.SubElement(root, "vType", **vtype)
+def _draw_types_and_departs(num_vehicles, duration, proportions, rng):
+    """draw the vehicle type index and departure time of all vehicles at once"""
+    proportions = np.asarray(proportions, dtype=float)
+    type_idx = rng.choice(len(VEHICLE_TYPES), size=num_vehicles, p=proportions / proportions.sum())
+    departs = np.round(rng.uniform(0, duration, num_vehicles), 2)
+    return type_idx, departs
 
-    # Add trips
-    for trip in trips:
-        ET.SubElement(root, "trip", attrib={
-            "id": trip["id"],
-            "type": trip["type"],
-            "depart": str(trip["depart"]),
-            "from": trip["from"],
-            "to": trip["to"]})
-
-    # Write to file
-    tree = ET.ElementTree(root)
-    tree.write(filename, encoding="utf-8", xml_declaration=True)
-    print(f"Generated {len(trips)} trips and saved to {filename}")
+def generate_trip_array_defined(num_vehicles, duration, proportions, routes, rng=None):
+    """vectorized generate_trips_defined returning a structured array with the fields
+    index, type, depart, from and to (the trip id is f"{type}_{index}")"""
+    if rng is None:
+        rng = default_rng()
+    types = list(VEHICLE_TYPES)
+    type_idx, departs = _draw_types_and_departs(num_vehicles, duration, proportions, rng)
+    edges = {e for type_routes in routes.values() for source, sinks in type_routes.items() for e in [source] + sinks}
+    trips = np.empty(num_vehicles, dtype=_trip_dtype(types, edges))
+    trips["index"] = np.arange(num_vehicles)
+    trips["type"] = np.array(types)[type_idx]
+    trips["depart"] = departs
+
+    for t, veh_type in enumerate(types):
+        mask = type_idx == t
+        count = np.count_nonzero(mask)
+        if count == 0:
+            continue
+        if not routes.get(veh_type):
+            raise ValueError(f"No compatible routes found for vehicle type: {veh_type}")
+        sources = list(routes[veh_type].keys())
+        # flatten the sinks of all sources, a sink is drawn uniformly from the range of its source
+        sink_lists = [routes[veh_type][source] for source in sources]
+        for source, sinks in zip(sources, sink_lists):
+            if not sinks:
+                raise ValueError(f"No sinks defined for source {source} of vehicle type: {veh_type}")
+        num_sinks = np.array([len(sinks) for sinks in sink_lists])
+        offsets = np.concatenate(([0], np.cumsum(num_sinks)[:-1]))
+        all_sinks = np.array([sink for sinks in sink_lists for sink in sinks])
+
+        source_idx = rng.integers(0, len(sources), count)
+        sink_idx = offsets[source_idx] + (rng.random(count) * num_sinks[source_idx]).astype(np.int64)
+        trips["from"][mask] = np.array(sources)[source_idx]
+        trips["to"][mask] = all_sinks[sink_idx]
+    return trips
+
+def generate_trip_array(num_vehicles, duration, proportions, sinks, sources, rng=None):
+    """vectorized generate_trips for given sinks and sources returning a structured array
+    with the fields index, type, depart, from and to (the trip id is f"{type}_{index}")"""
+    if rng is None:
+        rng = default_rng()
+    types = list(VEHICLE_TYPES)
+    type_idx, departs = _draw_types_and_departs(num_vehicles, duration, proportions, rng)
+    trips = np.empty(num_vehicles, dtype=_trip_dtype(types, list(sinks) + list(sources)))
+    trips["index"] = np.arange(num_vehicles)
+    trips["type"] = np.array(types)[type_idx]
+    trips["depart"] = departs
+    trips["from"] = np.array(sources)[rng.integers(0, len(sources), num_vehicles)]
+    trips["to"] = np.array(sinks)[rng.integers(0, len(sinks), num_vehicles)]
+    return trips
+
+def sort_trip_array(trips):
+    """sort a trip array by departure time"""
+    return trips[np.argsort(trips["depart"], kind="stable")]
+
+def trips_from_array(trips):
+    """convert a trip array into the list of dicts used by the non vectorized functions"""
+    return [{
+        "id": f"{veh_type}_{index}",
+        "type": veh_type,
+        "depart": depart,
+        "from": from_edge,
+        "to": to_edge
+    } for index, veh_type, depart, from_edge, to_edge in trips.tolist()]
+
+def _iter_trip_array(trips, chunk_size=65536):
+    """iterate over a trip array as dicts, converting only a chunk at a time"""
+    for start in range(0, len(trips), chunk_size):
+        yield from trips_from_array(trips[start:start + chunk_size])
+
+_XML_SPECIAL = re.compile(r'[&<>"\'\n\r\t]')
+
+def _quote(value):
+    """quote an attribute value, escaping only when needed (ids and numbers rarely need it)"""
+    value = str(value)
+    if _XML_SPECIAL.search(value):
+        return sumolib.xml.quoteattr(value)
+    return f'"{value}"'
+
+def _attrs(attrs):
+    """format xml attributes"""
+    return " ".join(f"{key}={_quote(value)}" for key, value in attrs.items())
+
+def write_rou_file(filename, trips, route_cache=None):
+    """Write trips to a .rou.xml file with vehicle type definitions.
+
+    The file is written while iterating over the trips without building an element tree,
+    it is compressed if the filename ends with .gz. trips may be a list of dicts or a
+    trip array from the vectorized generators, which is sorted by departure time if needed.
+    If a route cache (see build_route_cache) is given, the trips are written as vehicles
+    with their route so the file can be simulated without running duarouter."""
+    if isinstance(trips, np.ndarray):
+        if np.any(np.diff(trips["depart"]) < 0):
+            trips = sort_trip_array(trips)
+        trips = _iter_trip_array(trips)
+
+    count = 0
+    with sumolib.openz(filename, "w") as outf:
+        sumolib.xml.writeHeader(outf, root="routes")
+        for vtype in VEHICLE_TYPES.values():
+            outf.write(f"    <vType {_attrs(vtype)}/>\n")
+
+        # Add trips, or fully routed vehicles if the routes are known
+        for trip in trips:
+            if route_cache is None:
+                outf.write("    <trip %s/>\n" % _attrs({
+                    "id": trip["id"],
+                    "type": trip["type"],
+                    "depart": trip["depart"],
+                    "from": trip["from"],
+                    "to": trip["to"]}))
+            else:
+                outf.write("    <vehicle %s>\n" % _attrs({
+                    "id": trip["id"],
+                    "type": trip["type"],
+                    "depart": trip["depart"]}))
+                edges = route_cache[get_vclass(trip["type"]), trip["from"], trip["to"]]
+                outf.write(f"        <route edges={_quote(edges)}/>\n")
+                outf.write("    </vehicle>\n")
+            count += 1
+        outf.write("</routes>\n")
+    print(f"Generated {count} trips and saved to {filename}")
 
 def plot_departure_histogram_by_type(trips, duration, num_bins=60):
     """plot the distribution of vehicle departures over normalised time by vehicle type"""
@@ -162,21 +283,46 @@ def get_sinks_and_sources(net_file):
 
     return sinks, sources
 
+def get_vclass(veh_type):
+    """vehicle class used by SUMO for the given vehicle type (SUMO defaults to passenger)"""
+    return VEHICLE_TYPES[veh_type].get("vClass", "passenger")
+
+def build_route_cache(net_file, vehicle_routes, fastest=True):
+    """compute the path for every (vClass, source, sink) in vehicle_routes once
+
+    Uses the fastest path by default, as duarouter does. Returns a dict mapping
+    (vClass, from, to) to the space separated edge ids of the route."""
+    net = sumolib.net.readNet(net_file)
+    route_cache = {}
+    for veh_type, routes in vehicle_routes.items():
+        vclass = get_vclass(veh_type)
+        for source, sinks in routes.items():
+            sinks = [sink for sink in sinks if (vclass, source, sink) not in route_cache]
+            # a single search from the source finds the paths to all of its sinks
+            paths = net.getOptimalPaths(net.getEdge(source), [net.getEdge(sink) for sink in sinks],
+                                        fastest=fastest, vClass=vclass)
+            for sink in sinks:
+                path, _ = paths[net.getEdge(sink)]
+                if path is None:
+                    raise ValueError(f"No route found from {source} to {sink} for vehicle class: {vclass}")
+                route_cache[vclass, source, sink] = " ".join(edge.getID() for edge in path)
+    return route_cache
+
 def generate_route_file_defined_routes(
         route_file,
         total_vehicles,
         duration,
         vehicle_proportions,
-        vehicle_routes):
+        vehicle_routes,
+        route_cache=None):
     """generate random routes for a given vehicle proportions and write to a .rou.xml file"""
 
-    trips = generate_trips_defined(
+    trips = generate_trip_array_defined(
         total_vehicles,
         duration,
         vehicle_proportions,
         vehicle_routes)
-    trips.sort(key=lambda x: x["depart"])
-    write_rou_file(route_file, trips)
+    write_rou_file(route_file, trips, route_cache)
 
 def generate_route_file_sink_to_source(
         net_file,
@@ -191,13 +337,12 @@ def generate_route_file_sink_to_source(
     if not sinks or not sources:
         raise ValueError("No sink or source edges found in the network file.")
 
-    trips = generate_trips(
+    trips = generate_trip_array(
         total_vehicles,
         duration,
         vehicle_proportions,
         sinks,
         sources)
-    trips.sort(key=lambda x: x["depart"])
     write_rou_file(route_file, trips)
 
 def get_trips_from_rou(route_file):
@@ -213,4 +358,13 @@ def get_trips_from_rou(route_file):
             "from": trip.get("from"),
             "to": trip.get("to")
         })
+    for vehicle in root.findall("vehicle"):
+        edges = vehicle.find("route").get("edges").split()
+        trips.append({
+            "id": vehicle.get("id"),
+            "type": vehicle.get("type"),
+            "depart": float(vehicle.get("depart")),
+            "from": edges[0],
+            "to": edges[-1]
+        })
     return trips
@@ -2,14 +2,21 @@
 
 import subprocess
 import os
+import select
+import socket
+import tempfile
+import time
 import xml.etree.ElementTree as ET
 import pandas as pd
 
+from emissions import sum_emission_totals
+from sumolib.miscutils import getFreeSocketPort
 
-def run_sumo_simulation(config_file):
+
+def run_sumo_simulation(config_file, cwd=None):
     """Run SUMO simulation with the specified configuration file"""
     sumo_command = ["sumo", "-c", config_file]
-    subprocess.run(sumo_command, check=False)
+    subprocess.run(sumo_command, check=False, cwd=cwd)
 
 def parse_emission_data(emission_file):
     """Parse SUMO emission file and extracts vehicle emissions data"""
@@ -18,30 +25,106 @@ def parse_emission_data(emission_file):
         print(f"❌ No emission data found for {emission_file}. Skipping...")
         return None
 
-    tree = ET.parse(emission_file)
-    root = tree.getroot()
-
-    # Initialize total sums
-    total_emissions = {
-        "Total CO2 (g)": 0,
-        "Total CO (g)": 0,
-        "Total HC (g)": 0,
-        "Total NOx (g)": 0,
-        "Total PMx (g)": 0,
-        "Total Fuel (L)": 0
-    }
-
-    # Extract and sum emissions
-    for timestep in root.findall("timestep"):
-        for vehicle in timestep.findall("vehicle"):
-            total_emissions["Total CO2 (g)"] += float(vehicle.get("CO2", 0))
-            total_emissions["Total CO (g)"] += float(vehicle.get("CO", 0))
-            total_emissions["Total HC (g)"] += float(vehicle.get("HC", 0))
-            total_emissions["Total NOx (g)"] += float(vehicle.get("NOx", 0))
-            total_emissions["Total PMx (g)"] += float(vehicle.get("PMx", 0))
-            total_emissions["Total Fuel (L)"] += float(vehicle.get("fuel", 0))
+    # Sum emissions in a single streaming pass
+    total_emissions = sum_emission_totals(emission_file)
 
     # Convert to DataFrame
     df = pd.DataFrame([total_emissions])
 
     return df
+
+def _open_fifo(fifo, process, timeout):
+    """Open the FIFO for reading once SUMO has written to it
+
+    The FIFO is opened non-blocking and polled, so waiting stops when SUMO exits
+    without opening it (e.g. on a configuration error) or after timeout seconds.
+    Returns a blocking binary stream or None.
+    """
+    fd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+    deadline = time.monotonic() + timeout
+    while True:
+        # checked before polling so data written just before exiting is not lost
+        exited = process.poll() is not None
+        readable, _, _ = select.select([fd], [], [], 0.1)
+        if readable:
+            os.set_blocking(fd, True)
+            return os.fdopen(fd, "rb")
+        if exited or time.monotonic() > deadline:
+            os.close(fd)
+            return None
+
+def run_sumo_simulation_live(config_file, cwd=None, transport="socket", timeout=60):
+    """Run SUMO simulation and sum the emissions while they are written
+
+    The emission output is redirected to a local socket (or a FIFO for transport="fifo")
+    instead of a file, so nothing is written to disk and the totals are available when
+    SUMO exits. Returns the same DataFrame as parse_emission_data or None if SUMO did
+    not start the emission output within timeout seconds, delivered incomplete data
+    or exited with an error.
+    """
+    sumo_command = ["sumo", "-c", config_file, "--emission-output"]
+
+    if transport == "socket":
+        # listen before starting SUMO, it connects as soon as it opens its outputs
+        port = getFreeSocketPort()
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("localhost", port))
+        server.listen(1)
+        server.settimeout(0.1)
+        process = subprocess.Popen(sumo_command + [f"localhost:{port}"], cwd=cwd)
+        deadline = time.monotonic() + timeout
+        conn = None
+        try:
+            while conn is None:
+                # checked before accepting so a connection made just before exiting is not lost
+                exited = process.poll() is not None
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    if exited or time.monotonic() > deadline:
+                        break
+        finally:
+            server.close()
+        if conn is None:
+            print(f"❌ SUMO did not connect to port {port} (exit code {process.poll()}). Skipping...")
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            return None
+        conn.settimeout(None)
+        stream = conn.makefile("rb")
+        conn.close()
+    elif transport == "fifo":
+        fifo_dir = tempfile.mkdtemp()
+        fifo = os.path.join(fifo_dir, "emissions.xml")
+        os.mkfifo(fifo)
+        process = subprocess.Popen(sumo_command + [fifo], cwd=cwd)
+        try:
+            stream = _open_fifo(fifo, process, timeout)
+        finally:
+            os.remove(fifo)
+            os.rmdir(fifo_dir)
+        if stream is None:
+            print(f"❌ SUMO did not write to {fifo} (exit code {process.poll()}). Skipping...")
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            return None
+    else:
+        raise ValueError(f"Unknown transport for emission output: {transport}")
+
+    try:
+        total_emissions = sum_emission_totals(stream)
+    except ET.ParseError:
+        print("❌ Incomplete emission data received from SUMO. Skipping...")
+        total_emissions = None
+    finally:
+        stream.close()
+        process.wait()
+
+    if process.returncode != 0:
+        print(f"❌ SUMO exited with code {process.returncode}. Skipping...")
+        return None
+    if total_emissions is None:
+        return None
+    return pd.DataFrame([total_emissions])
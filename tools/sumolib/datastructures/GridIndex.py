@@ -0,0 +1,72 @@
+# Eclipse SUMO, Simulation of Urban MObility; see https://eclipse.dev/sumo
+# Copyright (C) 2008-2025 German Aerospace Center (DLR) and others.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License 2.0 which is available at
+# https://www.eclipse.org/legal/epl-2.0/
+# This Source Code may also be made available under the following Secondary
+# Licenses when the conditions for such availability set forth in the Eclipse
+# Public License 2.0 are satisfied: GNU General Public License, version 2
+# or later which is available at
+# https://www.gnu.org/licenses/old-licenses/gpl-2.0-standalone.html
+# SPDX-License-Identifier: EPL-2.0 OR GPL-2.0-or-later
+
+# @file    GridIndex.py
+# @date    2026-10-18
+
+"""
+uniform grid index for bounding boxes, a pure python replacement for the
+rtree queries used by sumolib.net
+"""
+from __future__ import absolute_import
+
+import math
+from collections import defaultdict
+
+
+class GridIndex:
+
+    """Maps bounding boxes (xmin, ymin, xmax, ymax) to the cells of a uniform grid.
+
+    The ids of the boxes are their positions in the list given to the constructor.
+    The cell size defaults to the average box extent so that a typical box
+    occupies few cells and a query with a small radius visits few cells.
+    """
+
+    def __init__(self, boxes, cellSize=None):
+        self._boxes = list(boxes)
+        if cellSize is None:
+            extents = [max(b[2] - b[0], b[3] - b[1]) for b in self._boxes]
+            cellSize = sum(extents) / len(extents) if extents else 1.
+        self._cellSize = max(cellSize, 1e-3)
+        self._cells = defaultdict(list)
+        for i, box in enumerate(self._boxes):
+            x0, y0, x1, y1 = self._cellRange(box)
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    self._cells[(cx, cy)].append(i)
+
+    def _cellRange(self, box):
+        c = self._cellSize
+        return (int(math.floor(box[0] / c)), int(math.floor(box[1] / c)),
+                int(math.floor(box[2] / c)), int(math.floor(box[3] / c)))
+
+    def intersection(self, box):
+        """Returns the ids of all boxes which intersect the given box (in no particular order)."""
+        xmin, ymin, xmax, ymax = box
+        x0, y0, x1, y1 = self._cellRange(box)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            # the query covers more cells than are occupied, check all boxes
+            candidates = range(len(self._boxes))
+        else:
+            candidates = set()
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cell = self._cells.get((cx, cy))
+                    if cell:
+                        candidates.update(cell)
+        result = []
+        for i in candidates:
+            b = self._boxes[i]
+            if b[0] <= xmax and b[2] >= xmin and b[1] <= ymax and b[3] >= ymin:
+                result.append(i)
+        return result
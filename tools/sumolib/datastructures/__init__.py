@@ -17,3 +17,4 @@
 from __future__ import absolute_import
 
 from . import OrderedMultiSet  # noqa
+from . import GridIndex  # noqa
@@ -21,7 +21,16 @@ from __future__ import absolute_import
 import math
 import sys
 
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
 INVALID_DISTANCE = -1
+# polygons with at least this many points are handled by the NumPy implementations
+# (for shorter ones the array conversion costs more than the loop)
+NUMPY_MIN_POINTS = 64
 
 # back-ported from python 3 for backward compatibility
 # https://www.python.org/dev/peps/pep-0485/#proposed-implementation
@@ -37,7 +46,27 @@ def distance(p1, p2):
     return math.sqrt(dx * dx + dy * dy)
 
 
+def _useNumpy(polygon):
+    return HAVE_NUMPY and (isinstance(polygon, np.ndarray) or len(polygon) >= NUMPY_MIN_POINTS)
+
+
+def _coordinates(polygon):
+    coords = np.asarray(polygon, dtype=float)
+    return coords[:, 0], coords[:, 1]
+
+
+def _segmentLengths(x, y):
+    dx = x[:-1] - x[1:]
+    dy = y[:-1] - y[1:]
+    return np.sqrt(dx * dx + dy * dy)
+
+
 def polyLength(polygon):
+    if _useNumpy(polygon):
+        if len(polygon) < 2:
+            return 0
+        # cumsum adds sequentially like the builtin sum (np.sum uses pairwise summation)
+        return float(np.cumsum(_segmentLengths(*_coordinates(polygon)))[-1])
     return sum([distance(a, b) for a, b in zip(polygon[:-1], polygon[1:])])
 
 
@@ -79,6 +108,8 @@ def lineOffsetWithMinimumDistanceToPoint(point, line_start, line_end, perpendicu
 
 def polygonOffsetAndDistanceToPoint(point, polygon, perpendicular=False):
     """Return the offset and the distance from the polygon start where the distance to the point is minimal"""
+    if _useNumpy(polygon):
+        return _polygonOffsetAndDistanceToPointNumpy(point, polygon, perpendicular)
     p = point
     s = polygon
     seen = 0
@@ -108,6 +139,49 @@ def polygonOffsetAndDistanceToPoint(point, polygon, perpendicular=False):
     return minOffset, minDist
 
 
+def _polygonOffsetAndDistanceToPointNumpy(point, polygon, perpendicular):
+    """NumPy version of polygonOffsetAndDistanceToPoint performing the same floating point operations"""
+    x, y = _coordinates(polygon)
+    if len(x) < 2:
+        return INVALID_DISTANCE, 1e400
+    px = float(point[0])
+    py = float(point[1])
+    x1 = x[:-1]
+    y1 = y[:-1]
+    dx = x[1:] - x1
+    dy = y[1:] - y1
+    d = _segmentLengths(x, y)
+    u = (px - x1) * dx + (py - y1) * dy
+    outside = (d == 0.) | (u < 0.) | (u > d * d)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        offset = np.where(outside, np.where(u < 0., 0., d), u / d)
+        # positionAtOffset snaps to the segment end points
+        snapEnd = np.abs(d - offset) <= 1e-09 * np.maximum(np.abs(d), np.abs(offset))
+        t = offset / d
+    qx = np.where(offset == 0., x1, np.where(snapEnd, x[1:], x1 + dx * t))
+    qy = np.where(offset == 0., y1, np.where(snapEnd, y[1:], y1 + dy * t))
+    ex = px - qx
+    ey = py - qy
+    dist = np.sqrt(ex * ex + ey * ey)
+    seen = np.zeros(len(d))
+    seen[1:] = np.cumsum(d[:-1])
+    candOffset = offset + seen
+    if perpendicular:
+        dist[outside] = np.inf
+        # inner corners between a segment ending before and a segment starting after the point
+        corner = np.zeros(len(d), dtype=bool)
+        corner[1:] = outside[1:] & (offset[:-1] == d[:-1]) & (offset[1:] == 0.)
+        cx = px - x1[corner]
+        cy = py - y1[corner]
+        dist[corner] = np.sqrt(cx * cx + cy * cy)
+        candOffset[corner] = seen[corner]
+    # every segment yields at most one candidate and the loop only keeps strictly smaller distances
+    best = int(np.argmin(dist))
+    if not dist[best] < 1e400:
+        return INVALID_DISTANCE, 1e400
+    return float(candOffset[best]), float(dist[best])
+
+
 def polygonOffsetWithMinimumDistanceToPoint(point, polygon, perpendicular=False):
     """Return the offset from the polygon start where the distance to the point is minimal"""
     return polygonOffsetAndDistanceToPoint(point, polygon, perpendicular)[0]
@@ -128,8 +202,43 @@ def distancePointToLine(point, line_start, line_end, perpendicular=False):
     return distance(point, intersection)
 
 
+def distancePointsToSegments(px, py, x1, y1, x2, y2, perpendicular=False):
+    """Return the distances between the points (px, py) and the lines ((x1, y1), (x2, y2)).
+
+    The arguments are NumPy arrays of equal length (or broadcastable). The result is
+    identical to distancePointToLine applied element-wise."""
+    dx = x2 - x1
+    dy = y2 - y1
+    d = np.sqrt(dx * dx + dy * dy)
+    u = (px - x1) * dx + (py - y1) * dy
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = np.where(u > d * d, 1., (u / d) / d)
+    # degenerate lines and points before the start are measured to the start point
+    outside = (d == 0.) | (u < 0.)
+    t = np.where(outside, 0., t)
+    ix = x1 + t * dx
+    iy = y1 + t * dy
+    ex = px - ix
+    ey = py - iy
+    dist = np.sqrt(ex * ex + ey * ey)
+    if perpendicular:
+        dist = np.where(outside | (u > d * d), INVALID_DISTANCE, dist)
+    return dist
+
+
 def distancePointToPolygon(point, polygon, perpendicular=False):
     """Return the minimum distance between point and polygon"""
+    if _useNumpy(polygon):
+        x, y = _coordinates(polygon)
+        dist = distancePointsToSegments(float(point[0]), float(point[1]), x[:-1], y[:-1], x[1:], y[1:],
+                                        perpendicular)
+        if perpendicular:
+            # distance to inner corners
+            cx = point[0] - x[1:-1]
+            cy = point[1] - y[1:-1]
+            dist[1:] = np.where(dist[1:] == INVALID_DISTANCE, np.sqrt(cx * cx + cy * cy), dist[1:])
+            dist = dist[dist != INVALID_DISTANCE]
+        return float(dist.min()) if len(dist) else INVALID_DISTANCE
     p = point
     s = polygon
     minDist = None
@@ -167,6 +276,14 @@ def indexAtShapeOffset(shape, offset):
        the cumulated length of the shape up to the start point of the segment.
        If the offset is less or equal to 0, it returns (0, 0.) If the offset is
        larger than the shape length it returns (None, length of the shape)"""
+    if _useNumpy(shape):
+        if len(shape) < 2:
+            return None, 0.
+        lengths = np.cumsum(_segmentLengths(*_coordinates(shape)))
+        idx = int(np.argmax(lengths > offset))
+        if not lengths[idx] > offset:
+            return None, float(lengths[-1])
+        return idx, float(lengths[idx - 1]) if idx > 0 else 0.
     seenLength = 0.
     curr = shape[0]
     for idx, p in enumerate(shape[1:]):
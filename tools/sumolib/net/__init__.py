@@ -31,11 +31,10 @@ import sys
 import math
 import heapq
 import gzip
-import warnings
 import io
 from xml.sax import handler, parse
 from copy import copy
-from collections import defaultdict
+from collections import defaultdict, deque
 from itertools import chain
 
 try:
@@ -46,8 +45,9 @@ except ImportError:
     HAVE_LXML = False
 
 import sumolib
-from . import lane, edge, netshiftadaptor, node, connection, roundabout  # noqa
+from . import lane, edge, netshiftadaptor, node, connection, roundabout, netcache  # noqa
 from .connection import Connection
+from ..datastructures.GridIndex import GridIndex
 
 
 class TLS:
@@ -178,10 +178,48 @@ class EdgeType:
         self.disallow = disallow
 
 
+def _buildPath(pred, edge):
+    # concatenates the path segments stored as (predecessor, segment) for each edge
+    parts = []
+    while edge is not None:
+        edge, segment = pred[edge]
+        parts.append(segment)
+    return tuple(chain.from_iterable(reversed(parts)))
+
+
+# the net of a worker process of getOptimalPathMatrix
+_workerNet = None
+
+# functions of the edges inside a junction
+_SPECIAL_FUNCTIONS = ('internal', 'crossing', 'walkingarea')
+
+
+def _initPathWorker(data):
+    global _workerNet
+    _workerNet = netcache.loads(data)
+
+
+def _optimalPathsWorker(fromID, toIDs, options):
+    net = _workerNet
+    paths = net.getOptimalPaths(net.getEdge(fromID), [net.getEdge(e) for e in toIDs], **options)
+    return dict([(toEdge.getID(), (None if path is None else [e.getID() for e in path], cost))
+                 for toEdge, (path, cost) in paths.items()])
+
+
+def _defaultEdgeType():
+    # module level (instead of a lambda) so the net can be pickled by the network cache
+    return EdgeType("DEFAULT_EDGETYPE", "", "")
+
+
 class Net:
 
     """The whole sumo network."""
 
+    __slots__ = ('_location', '_id2node', '_id2edge', '_crossings_and_walkingAreas', '_macroConnectors', '_id2tls',
+                 '_nodes', '_edges', '_tlss', '_ranges', '_roundabouts', '_rtreeEdges', '_rtreeLanes', '_allLanes',
+                 '_origIdx', '_proj', 'hasInternal', 'hasWalkingArea', '_shortestPathCache', '_version',
+                 '_edgeTypes', '_heuristicFactors', '_internalPaths', '_segmentIndices')
+
     def __init__(self):
         self._location = {}
         self._id2node = {}
@@ -196,6 +234,8 @@ class Net:
         self._roundabouts = []
         self._rtreeEdges = None
         self._rtreeLanes = None
+        # SegmentIndex for the batch queries by (lanes, includeJunctions)
+        self._segmentIndices = None
         self._allLanes = []
         self._origIdx = None
         self._proj = None
@@ -204,7 +244,11 @@ class Net:
         # store dijsktra heap for reuse if the same origin is used repeatedly
         self._shortestPathCache = None
         self._version = None
-        self._edgeTypes = defaultdict(lambda: EdgeType("DEFAULT_EDGETYPE", "", ""))
+        self._edgeTypes = defaultdict(_defaultEdgeType)
+        # lower bounds for the A* heuristic, see _getHeuristicFactor
+        self._heuristicFactors = {}
+        # memoized results of getInternalPath
+        self._internalPaths = {}
 
     def getVersion(self):
         return self._version
@@ -321,8 +365,14 @@ class Net:
         edge_id, lane_index = laneID.rsplit("_", 1)
         return self.getEdge(edge_id).getLane(int(lane_index))
 
-    def _initRTree(self, shapeList, includeJunctions=True):
-        import rtree  # noqa
+    def _initRTree(self, shapeList, includeJunctions=True, allowFallback=True):
+        try:
+            import rtree  # noqa
+        except ImportError:
+            if not allowFallback:
+                raise
+            # pure python grid with the same intersection query
+            return GridIndex([shape.getBoundingBox(includeJunctions) for shape in shapeList])
         result = rtree.index.Index()
         result.interleaved = True
         for ri, shape in enumerate(shapeList):
@@ -332,48 +382,63 @@ class Net:
     # Please be aware that the resulting list of edges is NOT sorted
     def getNeighboringEdges(self, x, y, r=0.1, includeJunctions=True, allowFallback=True):
         edges = []
-        try:
-            if self._rtreeEdges is None:
-                self._rtreeEdges = self._initRTree(self._edges, includeJunctions)
-            for i in self._rtreeEdges.intersection((x - r, y - r, x + r, y + r)):
-                e = self._edges[i]
-                d = sumolib.geomhelper.distancePointToPolygon(
-                    (x, y), e.getShape(includeJunctions))
-                if d < r:
-                    edges.append((e, d))
-        except ImportError:
-            if not allowFallback:
-                raise
-            warnings.warn("Module 'rtree' not available. Using brute-force fallback.")
-            for the_edge in self._edges:
-                d = sumolib.geomhelper.distancePointToPolygon((x, y), the_edge.getShape(includeJunctions))
-                if d < r:
-                    edges.append((the_edge, d))
+        if self._rtreeEdges is None:
+            self._rtreeEdges = self._initRTree(self._edges, includeJunctions, allowFallback)
+        for i in self._rtreeEdges.intersection((x - r, y - r, x + r, y + r)):
+            e = self._edges[i]
+            d = sumolib.geomhelper.distancePointToPolygon(
+                (x, y), e.getShape(includeJunctions))
+            if d < r:
+                edges.append((e, d))
         return edges
 
     def getNeighboringLanes(self, x, y, r=0.1, includeJunctions=True, allowFallback=True):
         lanes = []
-        try:
-            if self._rtreeLanes is None:
-                for the_edge in self._edges:
-                    self._allLanes += the_edge.getLanes()
-                self._rtreeLanes = self._initRTree(self._allLanes, includeJunctions)
-            for i in self._rtreeLanes.intersection((x - r, y - r, x + r, y + r)):
-                the_lane = self._allLanes[i]
-                d = sumolib.geomhelper.distancePointToPolygon((x, y), the_lane.getShape(includeJunctions))
-                if d < r:
-                    lanes.append((the_lane, d))
-        except ImportError:
-            if not allowFallback:
-                raise
-            warnings.warn("Module 'rtree' not available. Using brute-force fallback.")
-            for the_edge in self._edges:
-                for the_lane in the_edge.getLanes():
-                    d = sumolib.geomhelper.distancePointToPolygon((x, y), the_lane.getShape(includeJunctions))
-                    if d < r:
-                        lanes.append((the_lane, d))
+        if self._rtreeLanes is None:
+            self._allLanes = [the_lane for the_edge in self._edges for the_lane in the_edge.getLanes()]
+            self._rtreeLanes = self._initRTree(self._allLanes, includeJunctions, allowFallback)
+        for i in self._rtreeLanes.intersection((x - r, y - r, x + r, y + r)):
+            the_lane = self._allLanes[i]
+            d = sumolib.geomhelper.distancePointToPolygon((x, y), the_lane.getShape(includeJunctions))
+            if d < r:
+                lanes.append((the_lane, d))
         return lanes
 
+    def _getSegmentIndex(self, lanes, includeJunctions):
+        from .segmentindex import SegmentIndex
+        if self._segmentIndices is None:
+            self._segmentIndices = {}
+        key = (lanes, includeJunctions)
+        if key not in self._segmentIndices:
+            if lanes:
+                shapes = [the_lane.getShape(includeJunctions) for the_edge in self._edges
+                          for the_lane in the_edge.getLanes()]
+            else:
+                shapes = [the_edge.getShape(includeJunctions) for the_edge in self._edges]
+            self._segmentIndices[key] = SegmentIndex(shapes)
+        return self._segmentIndices[key]
+
+    def getNeighboringEdgesBatch(self, points, r=0.1, includeJunctions=True):
+        """Returns the result of getNeighboringEdges for each of the given (x, y) points.
+
+        points may be a list of pairs or an (N, 2) array. All distances are computed
+        with NumPy over the flattened segments of the edge shapes (requires numpy).
+        """
+        pointIdx, edgeIdx, dist = self._getSegmentIndex(False, includeJunctions).query(points, r)
+        result = [[] for _ in range(len(points))]
+        for p, e, d in zip(pointIdx.tolist(), edgeIdx.tolist(), dist.tolist()):
+            result[p].append((self._edges[e], d))
+        return result
+
+    def getNeighboringLanesBatch(self, points, r=0.1, includeJunctions=True):
+        """Returns the result of getNeighboringLanes for each of the given (x, y) points (requires numpy)."""
+        lanes = [the_lane for the_edge in self._edges for the_lane in the_edge.getLanes()]
+        pointIdx, laneIdx, dist = self._getSegmentIndex(True, includeJunctions).query(points, r)
+        result = [[] for _ in range(len(points))]
+        for p, i, d in zip(pointIdx.tolist(), laneIdx.tolist(), dist.tolist()):
+            result[p].append((lanes[i], d))
+        return result
+
     def hasNode(self, id):
         return id in self._id2node
 
@@ -545,26 +610,64 @@ class Net:
             e.rebuildShape()
 
     def getInternalPath(self, conn, fastest=False):
-        minInternalCost = 1e400
-        minPath = None
-        for c in conn:
-            if c.getViaLaneID() != "":
-                viaCost = 0
-                viaID = c.getViaLaneID()
-                viaPath = []
-                while viaID != "":
-                    viaLane = self.getLane(viaID)
-                    viaCost += viaLane.getLength() if not fastest else viaLane.getLength() / viaLane.getSpeed()
-                    viaID = viaLane.getOutgoing()[0].getViaLaneID()
-                    viaPath.append(viaLane.getEdge())
-                if viaCost < minInternalCost:
-                    minInternalCost = viaCost
-                    minPath = viaPath
-        return minPath, minInternalCost
+        """Returns the internal edges of the connection with the cheapest via lanes
+        out of the given connections and their cost.
+        The result is memoized for each group of connections."""
+        key = (tuple(conn), fastest)
+        internalPath = self._internalPaths.get(key)
+        if internalPath is None:
+            minInternalCost = 1e400
+            minPath = None
+            for c in conn:
+                if c.getViaLaneID() != "":
+                    viaCost = 0
+                    viaID = c.getViaLaneID()
+                    viaPath = []
+                    while viaID != "":
+                        viaLane = self.getLane(viaID)
+                        viaCost += viaLane.getLength() if not fastest else viaLane.getLength() / viaLane.getSpeed()
+                        viaID = viaLane.getOutgoing()[0].getViaLaneID()
+                        viaPath.append(viaLane.getEdge())
+                    if viaCost < minInternalCost:
+                        minInternalCost = viaCost
+                        minPath = tuple(viaPath)
+            internalPath = self._internalPaths[key] = (minPath, minInternalCost)
+        minPath, minInternalCost = internalPath
+        return (None if minPath is None else list(minPath)), minInternalCost
+
+    def _getHeuristicFactor(self, fastest):
+        """Returns the minimum ratio of edge cost to the air distance of its nodes.
+
+        Multiplied with the air distance between two nodes this is a lower bound
+        for the cost of every path connecting them (an admissible A* heuristic).
+        """
+        if fastest not in self._heuristicFactors:
+            factor = 1e400
+            for e in self._edges:
+                dist = sumolib.geomhelper.distance(e.getFromNode().getCoord(), e.getToNode().getCoord())
+                if dist > 0:
+                    factor = min(factor, e.getLength() / (e.getSpeed() if fastest else 1.0) / dist)
+            self._heuristicFactors[fastest] = factor if factor < 1e400 else 0.
+        return self._heuristicFactors[fastest]
+
+    def _addStepCost(self, cost, e1, e2, conn, fastest, reversalPenalty, withInternal):
+        """Returns the cost after stepping from e1 to e2 via the connections conn
+        and the edges which are added to the path by this step."""
+        newCost = cost + e2.getLength() / (e2.getSpeed() if fastest else 1.0)
+        if e2 == e1.getBidi():
+            newCost += reversalPenalty
+        minPath = (e2,)
+        if self.hasInternal and conn is not None:
+            viaPath, minInternalCost = self.getInternalPath(conn, fastest=fastest)
+            if viaPath is not None:
+                newCost += minInternalCost
+                if withInternal:
+                    minPath = tuple(viaPath + [e2])
+        return newCost, minPath
 
     def getOptimalPath(self, fromEdge, toEdge, fastest=False, maxCost=1e400, vClass=None, reversalPenalty=0,
                        includeFromToCost=True, withInternal=False, ignoreDirection=False,
-                       fromPos=None, toPos=None):
+                       fromPos=None, toPos=None, algorithm="dijkstra"):
         """
         Finds the optimal (shortest or fastest) path for vClass from fromEdge to toEdge
         by using using Dijkstra's algorithm.
@@ -575,6 +678,11 @@ class Net:
         The path itself does not include internal edges except for the case
         when the start or end edge are internal edges.
         The search may be limited using the given threshold.
+        The algorithm may be "dijkstra", "astar" (goal directed by the air distance
+        of the node coordinates) or "bidirectional". A* finds a path of the same cost, the
+        bidirectional search the same path as Dijkstra's algorithm. Both alternatives only
+        return paths within maxCost. They fall back to Dijkstra's algorithm for
+        ignoreDirection and for a fromPos behind toPos on the same edge.
         """
 
         def speedFunc(edge):
@@ -591,47 +699,79 @@ class Net:
             else:
                 return []
 
+        def addStepCost(cost, e1, e2, conn):
+            return self._addStepCost(cost, e1, e2, conn, fastest, reversalPenalty, withInternal)
+
+        def finish(path, cost):
+            if includeFromToCost:
+                # add costs for (part of) the first edge, still needs to be fixed for wrong direction travel
+                remainFrom = fromEdge.getLength() if fromPos is None else remainder(fromEdge, fromPos)
+                cost += remainFrom / speedFunc(fromEdge)
+                # remove costs for (part of) the last edge, still needs to be fixed for wrong direction travel
+                removeTo = 0. if toPos is None else remainder(toEdge, toPos)
+            else:
+                removeTo = toEdge.getLength() if len(path) > 1 else 0.
+            cost -= removeTo / speedFunc(fromEdge)
+            if self.hasInternal:
+                if appendix:
+                    return path + appendix, cost + appendixCost
+                elif ignoreDirection and self.hasWalkingArea and not withInternal:
+                    return [e for e in path if e.getFunction() == ''], cost
+            return path, cost
+
+        appendix = ()
+        appendixCost = 0.
         if self.hasInternal:
-            appendix = ()
-            appendixCost = 0.
             while toEdge.getFunction() == "internal":
                 appendix = (toEdge,) + appendix
                 appendixCost += toEdge.getLength() / speedFunc(toEdge)
                 toEdge = list(toEdge.getIncoming().keys())[0]
-        q = [(0., fromEdge.getID(), (fromEdge, ), ())]
+        # heap entries are (priority, cost, id, path segment, predecessor)
+        q = [(0., 0., fromEdge.getID(), (fromEdge, ), None)]
         if (fromEdge == toEdge and fromPos is not None and toPos is not None and fromPos > toPos and
                 not ignoreDirection):
             # start search on successors of fromEdge
             q = []
             for e2, conn in fromEdge.getAllowedOutgoing(vClass).items():
-                q.append((e2.getLength() / speedFunc(e2), e2.getID(), (fromEdge, e2), ()))
+                q.append((e2.getLength() / speedFunc(e2), e2.getLength() / speedFunc(e2), e2.getID(),
+                          (fromEdge, e2), None))
+            algorithm = "dijkstra"
+        if ignoreDirection:
+            algorithm = "dijkstra"
+
+        if algorithm == "bidirectional":
+            result = self._bidirectionalSearch(fromEdge, toEdge, maxCost, vClass, addStepCost)
+            if result is None:
+                return None, 1e400
+            path, cost = result
+            if path is None:
+                return None, cost
+            return finish(path, cost)
+
+        if algorithm == "astar":
+            factor = self._getHeuristicFactor(fastest)
+            target = toEdge.getToNode().getCoord()
+
+            def heuristic(edge):
+                return factor * sumolib.geomhelper.distance(edge.getToNode().getCoord(), target)
+        elif algorithm == "dijkstra":
+            heuristic = None
+        else:
+            raise ValueError("Unknown routing algorithm '%s'" % algorithm)
 
         seen = set()
+        pred = {}
         dist = {fromEdge: 0.}
         while q:
-            cost, _, e1via, path = heapq.heappop(q)
+            priority, cost, _, e1via, e0 = heapq.heappop(q)
             e1 = e1via[-1]
             if e1 in seen:
                 continue
             seen.add(e1)
-            path += e1via
+            pred[e1] = (e0, e1via)
             if e1 == toEdge:
-                if includeFromToCost:
-                    # add costs for (part of) the first edge, still needs to be fixed for wrong direction travel
-                    remainFrom = fromEdge.getLength() if fromPos is None else remainder(fromEdge, fromPos)
-                    cost += remainFrom / speedFunc(fromEdge)
-                    # remove costs for (part of) the last edge, still needs to be fixed for wrong direction travel
-                    removeTo = 0. if toPos is None else remainder(toEdge, toPos)
-                else:
-                    removeTo = toEdge.getLength() if len(path) > 1 else 0.
-                cost -= removeTo / speedFunc(fromEdge)
-                if self.hasInternal:
-                    if appendix:
-                        return path + appendix, cost + appendixCost
-                    elif ignoreDirection and self.hasWalkingArea and not withInternal:
-                        return [e for e in path if e.getFunction() == ''], cost
-                return path, cost
-            if cost > maxCost:
+                return finish(_buildPath(pred, e1), cost)
+            if priority > maxCost:
                 return None, cost
 
             for e2, conn in chain(e1.getAllowedOutgoing(vClass).items(),
@@ -639,24 +779,103 @@ class Net:
                                   getToNormalIncoming(e1) if ignoreDirection and not self.hasWalkingArea else []):
                 # print(cost, e1.getID(), e2.getID(), e2 in seen)
                 if e2 not in seen:
-                    newCost = cost + e2.getLength() / speedFunc(e2)
-                    if e2 == e1.getBidi():
-                        newCost += reversalPenalty
-                    minPath = (e2,)
-                    if self.hasInternal and conn is not None:
-                        viaPath, minInternalCost = self.getInternalPath(conn, fastest=fastest)
-                        if viaPath is not None:
-                            newCost += minInternalCost
-                            if withInternal:
-                                minPath = tuple(viaPath + [e2])
+                    newCost, minPath = addStepCost(cost, e1, e2, conn)
                     if e2 not in dist or newCost < dist[e2]:
                         dist[e2] = newCost
-                        heapq.heappush(q, (newCost, e2.getID(), minPath, path))
+                        newPriority = newCost if heuristic is None else newCost + heuristic(e2)
+                        heapq.heappush(q, (newPriority, newCost, e2.getID(), minPath, e1))
         return None, 1e400
 
+    def _bidirectionalSearch(self, fromEdge, toEdge, maxCost, vClass, addStepCost):
+        """Runs Dijkstra's algorithm from both ends until the searches meet.
+
+        The backward distances are then used to prune the forward search which is continued
+        until it reaches toEdge. The forward search pops the edges in the same order and
+        chooses the same predecessors as the unidirectional search, so the path and its cost
+        are identical to the result of Dijkstra's algorithm (also for equal cost alternatives).
+        Returns the path and its cost, (None, cost) if the cost exceeds maxCost
+        or None if toEdge is unreachable.
+        """
+        queues = ([(0., fromEdge.getID(), fromEdge)], [(0., toEdge.getID(), toEdge)])
+        dists = ({fromEdge: 0.}, {toEdge: 0.})
+        preds = ({fromEdge: None}, {toEdge: None})
+        seen = (set(), set())
+        best = 1e400 if fromEdge != toEdge else 0.
+        while queues[0] and queues[1]:
+            bound = queues[0][0][0] + queues[1][0][0]
+            if bound >= best:
+                break
+            if bound > maxCost:
+                return None, bound
+            # expand the smaller queue
+            forward = len(queues[0]) <= len(queues[1])
+            d = 0 if forward else 1
+            cost, _, e1 = heapq.heappop(queues[d])
+            if e1 in seen[d]:
+                continue
+            seen[d].add(e1)
+            if forward:
+                steps = [(e2, e1, e2, conns) for e2, conns in e1.getAllowedOutgoing(vClass).items()]
+            else:
+                steps = [(e0, e0, e1, e0.getAllowedOutgoing(vClass).get(e1)) for e0 in e1.getIncoming()]
+            for e2, stepFrom, stepTo, conns in steps:
+                if not conns or e2 in seen[d]:
+                    continue
+                newCost = addStepCost(cost, stepFrom, stepTo, conns)[0]
+                if e2 not in dists[d] or newCost < dists[d][e2]:
+                    dists[d][e2] = newCost
+                    preds[d][e2] = e1
+                    heapq.heappush(queues[d], (newCost, e2.getID(), e2))
+                    if e2 in dists[1 - d] and newCost + dists[1 - d][e2] < best:
+                        best = newCost + dists[1 - d][e2]
+        if best >= 1e400:
+            return None
+
+        # Continue the forward search. An edge is only expanded if its cost plus a lower bound
+        # of the remaining cost (exact for edges settled backwards, the smallest open backward
+        # cost otherwise) does not exceed the optimum. Edges on optimal paths are never pruned,
+        # the tolerance covers the different summation order of the backward costs.
+        q, dist, pred = queues[0], dists[0], preds[0]
+        backDist = dists[1]
+        backSettled = seen[1]
+        backOpen = queues[1][0][0] if queues[1] else 1e400
+        limit = best + 1e-9 * (1. + abs(best))
+
+        def lowerBound(edge):
+            return backDist[edge] if edge in backSettled else backOpen
+
+        while toEdge not in seen[0] and q:
+            cost, _, e1 = heapq.heappop(q)
+            if e1 in seen[0]:
+                continue
+            seen[0].add(e1)
+            if e1 == toEdge or cost + lowerBound(e1) > limit:
+                continue
+            for e2, conns in e1.getAllowedOutgoing(vClass).items():
+                if e2 in seen[0]:
+                    continue
+                newCost = addStepCost(cost, e1, e2, conns)[0]
+                if (e2 not in dist or newCost < dist[e2]) and newCost + lowerBound(e2) <= limit:
+                    dist[e2] = newCost
+                    pred[e2] = e1
+                    heapq.heappush(q, (newCost, e2.getID(), e2))
+        if toEdge not in seen[0]:
+            return None
+        edges = [toEdge]
+        while pred[edges[0]] is not None:
+            edges.insert(0, pred[edges[0]])
+        path = (fromEdge,)
+        cost = 0.
+        for e1, e2 in zip(edges, edges[1:]):
+            cost, minPath = addStepCost(cost, e1, e2, e1.getAllowedOutgoing(vClass)[e2])
+            path += minPath
+        if cost > maxCost:
+            return None, cost
+        return path, cost
+
     def getShortestPath(self, fromEdge, toEdge, maxCost=1e400, vClass=None, reversalPenalty=0,
                         includeFromToCost=True, withInternal=False, ignoreDirection=False,
-                        fromPos=None, toPos=None):
+                        fromPos=None, toPos=None, algorithm="dijkstra"):
         """
         Finds the shortest path from fromEdge to toEdge respecting vClass, using Dijkstra's algorithm.
         It returns a pair of a tuple of edges and the cost. If no path is found the first element is None.
@@ -668,11 +887,12 @@ class Net:
         """
 
         return self.getOptimalPath(fromEdge, toEdge, False, maxCost, vClass, reversalPenalty,
-                                   includeFromToCost, withInternal, ignoreDirection, fromPos, toPos)
+                                   includeFromToCost, withInternal, ignoreDirection, fromPos, toPos,
+                                   algorithm)
 
     def getFastestPath(self, fromEdge, toEdge, maxCost=1e400, vClass=None, reversalPenalty=0,
                        includeFromToCost=True, withInternal=False, ignoreDirection=False,
-                       fromPos=None, toPos=None):
+                       fromPos=None, toPos=None, algorithm="dijkstra"):
         """
         Finds the fastest path from fromEdge to toEdge respecting vClass, using Dijkstra's algorithm.
         It returns a pair of a tuple of edges and the cost. If no path is found the first element is None.
@@ -684,32 +904,131 @@ class Net:
         """
 
         return self.getOptimalPath(fromEdge, toEdge, True, maxCost, vClass, reversalPenalty,
-                                   includeFromToCost, withInternal, ignoreDirection, fromPos, toPos)
+                                   includeFromToCost, withInternal, ignoreDirection, fromPos, toPos,
+                                   algorithm)
+
+    def getOptimalPaths(self, fromEdge, toEdges, fastest=False, maxCost=1e400, vClass=None, reversalPenalty=0,
+                        includeFromToCost=True, withInternal=False):
+        """
+        Finds the optimal (shortest or fastest) paths for vClass from fromEdge to all toEdges
+        with a single run of Dijkstra's algorithm.
+        It returns a dict mapping each edge of toEdges to the pair of path and cost
+        which getOptimalPath returns for it.
+        The search stops once all targets are found or the threshold is exceeded.
+        """
+
+        def speedFunc(edge):
+            return edge.getSpeed() if fastest else 1.0
+
+        # normal edges where the search ends -> targets with their internal appendix
+        targets = defaultdict(list)
+        for toEdge in toEdges:
+            appendix = ()
+            appendixCost = 0.
+            target = toEdge
+            if self.hasInternal:
+                while target.getFunction() == "internal":
+                    appendix = (target,) + appendix
+                    appendixCost += target.getLength() / speedFunc(target)
+                    target = list(target.getIncoming().keys())[0]
+            targets[target].append((toEdge, appendix, appendixCost))
+
+        result = {}
+        if not targets:
+            return result
+        q = [(0., fromEdge.getID(), (fromEdge, ), None)]
+        seen = set()
+        pred = {}
+        dist = {fromEdge: 0.}
+        while q:
+            cost, _, e1via, e0 = heapq.heappop(q)
+            e1 = e1via[-1]
+            if e1 in seen:
+                continue
+            seen.add(e1)
+            pred[e1] = (e0, e1via)
+            if e1 in targets:
+                path = _buildPath(pred, e1)
+                if includeFromToCost:
+                    pathCost = cost + fromEdge.getLength() / speedFunc(fromEdge)
+                else:
+                    pathCost = cost - (e1.getLength() if len(path) > 1 else 0.) / speedFunc(fromEdge)
+                for toEdge, appendix, appendixCost in targets.pop(e1):
+                    if appendix:
+                        result[toEdge] = (path + appendix, pathCost + appendixCost)
+                    else:
+                        result[toEdge] = (path, pathCost)
+                if not targets:
+                    break
+            if cost > maxCost:
+                break
+            for e2, conn in e1.getAllowedOutgoing(vClass).items():
+                if e2 not in seen:
+                    newCost, minPath = self._addStepCost(cost, e1, e2, conn, fastest, reversalPenalty, withInternal)
+                    if e2 not in dist or newCost < dist[e2]:
+                        dist[e2] = newCost
+                        heapq.heappush(q, (newCost, e2.getID(), minPath, e1))
+        for remaining in targets.values():
+            for toEdge, _, _ in remaining:
+                result[toEdge] = (None, cost if cost > maxCost else 1e400)
+        return result
+
+    def getOptimalPathMatrix(self, fromEdges, toEdges, fastest=False, maxCost=1e400, vClass=None,
+                             reversalPenalty=0, includeFromToCost=True, withInternal=False, workers=None):
+        """
+        Finds the optimal paths between all pairs of fromEdges and toEdges (e.g. for an OD matrix)
+        with one search per source (see getOptimalPaths).
+        It returns a dict mapping (fromEdge, toEdge) to the pair of path and cost.
+        With workers > 1 the sources are distributed to a pool of worker processes.
+        """
+        toEdges = list(toEdges)
+        options = dict(fastest=fastest, maxCost=maxCost, vClass=vClass, reversalPenalty=reversalPenalty,
+                       includeFromToCost=includeFromToCost, withInternal=withInternal)
+        result = {}
+        if workers is None or workers <= 1:
+            for fromEdge in fromEdges:
+                for toEdge, pathCost in self.getOptimalPaths(fromEdge, toEdges, **options).items():
+                    result[(fromEdge, toEdge)] = pathCost
+            return result
+
+        from concurrent.futures import ProcessPoolExecutor
+        # edges are exchanged by id, the workers get their own copy of the net
+        toIDs = [e.getID() for e in toEdges]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initPathWorker,
+                                 initargs=(netcache.dumps(self),)) as executor:
+            fromIDs = [e.getID() for e in fromEdges]
+            for fromID, paths in zip(fromIDs, executor.map(_optimalPathsWorker, fromIDs,
+                                                           [toIDs] * len(fromIDs), [options] * len(fromIDs))):
+                for toID, (pathIDs, cost) in paths.items():
+                    path = None if pathIDs is None else tuple([self.getEdge(e) for e in pathIDs])
+                    result[(self.getEdge(fromID), self.getEdge(toID))] = (path, cost)
+        return result
+
+    def getRoutingGraph(self):
+        """Returns an array based routing graph of the normal edges, see routinggraph.RoutingGraph."""
+        from . import routinggraph
+        return routinggraph.RoutingGraph.fromNet(self)
 
     def getReachable(self, source, vclass=None, useIncoming=False):
         if vclass is not None and not source.allows(vclass):
             raise RuntimeError("'{}' does not allow {}".format(source.getID(), vclass))
-        fringe = [source]
+        queue = deque([source])
         found = set()
         found.add(source)
-        while len(fringe) > 0:
-            new_fringe = []
-            for e in fringe:
-                if vclass == "pedestrian":
-                    cands = chain(chain(*e.getIncoming().values()), chain(*e.getOutgoing().values()))
-                else:
-                    cands = chain(*(e.getIncoming().values() if useIncoming else e.getOutgoing().values()))
-                # print("\n".join(map(str, list(cands))))
-                for conn in cands:
-                    if vclass is None or (
-                            conn.getFromLane().allows(vclass)
-                            and conn.getToLane().allows(vclass)):
-                        for reachable in [conn.getTo(), conn.getFrom()]:
-                            if reachable not in found:
-                                # print("added %s via %s" % (reachable, conn))
-                                found.add(reachable)
-                                new_fringe.append(reachable)
-            fringe = new_fringe
+        while queue:
+            e = queue.popleft()
+            if vclass == "pedestrian":
+                cands = chain(chain(*e.getIncoming().values()), chain(*e.getOutgoing().values()))
+            else:
+                cands = chain(*(e.getIncoming().values() if useIncoming else e.getOutgoing().values()))
+            for conn in cands:
+                if vclass is None or (
+                        conn.getFromLane().allows(vclass)
+                        and conn.getToLane().allows(vclass)):
+                    for reachable in (conn.getTo(), conn.getFrom()):
+                        if reachable not in found:
+                            found.add(reachable)
+                            queue.append(reachable)
         return found
 
 
@@ -737,6 +1056,62 @@ class NetReader(handler.ContentHandler):
             sys.stderr.write("Warning: Option withPedestrianConnections requires withInternal\n")
             self._withInternal = True
         self._bidiEdgeIDs = {}
+        # filters for partial loading (see readNet)
+        self._bbox = others.get('bbox')
+        self._edgeTypes = set(others['edgeTypes']) if others.get('edgeTypes') is not None else None
+        self._edgeIDs = None
+
+    def isPartial(self):
+        return self._bbox is not None or self._edgeTypes is not None or self._edgeIDs is not None
+
+    def _keepEdge(self, edgeID, function, edgeType):
+        # special edges are kept if their junction is kept (see _removeDetached), so the via lanes
+        # of all connections between kept edges are available
+        if function in _SPECIAL_FUNCTIONS:
+            return True
+        if self._edgeIDs is not None and edgeID not in self._edgeIDs:
+            return False
+        return self._edgeTypes is None or function != '' or edgeType in self._edgeTypes
+
+    def _hasViaLane(self, viaLaneID):
+        if not viaLaneID or not self._withInternal:
+            return True
+        viaEdgeID, index = viaLaneID.rsplit('_', 1)
+        return self._net.hasEdge(viaEdgeID) and int(index) < self._net.getEdge(viaEdgeID).getLaneNumber()
+
+    def _intersectsBBox(self, edge):
+        xmin, ymin, xmax, ymax = self._bbox
+        for lane in edge.getLanes():
+            bxmin, bymin, bxmax, bymax = lane.getBoundingBox(False)
+            if bxmin <= xmax and bxmax >= xmin and bymin <= ymax and bymax >= ymin:
+                return True
+        return False
+
+    def _dropEdge(self, edge):
+        """removes the edge which was added last"""
+        self._net._edges.pop()
+        del self._net._id2edge[edge.getID()]
+        if edge.getFromNode():
+            edge.getFromNode().getOutgoing().remove(edge)
+        if edge.getToNode():
+            edge.getToNode().getIncoming().remove(edge)
+        self._bidiEdgeIDs.pop(edge.getID(), None)
+
+    def _removeDetached(self):
+        """removes the special edges at junctions without normal edges and nodes without edges"""
+        net = self._net
+        kept = set()
+        for e in net._edges:
+            if e.getFunction() not in _SPECIAL_FUNCTIONS:
+                kept.add(e.getFromNode())
+                kept.add(e.getToNode())
+        dropped = set([e for e in net._edges if e.getFromNode() not in kept])
+        if dropped:
+            net._edges = [e for e in net._edges if e not in dropped]
+            for e in dropped:
+                del net._id2edge[e.getID()]
+        net._nodes = [n for n in net._nodes if n in kept]
+        net._id2node = dict([(n.getID(), n) for n in net._nodes])
 
     def startElement(self, name, attrs):
         if name == 'net':
@@ -749,9 +1124,10 @@ class NetReader(handler.ContentHandler):
             self._net._edgeTypes[attrs['id']] = EdgeType(attrs['id'], attrs.get('allow'), attrs.get('disallow'))
         elif name == 'edge':
             function = attrs.get('function', '')
-            if (function == ''
+            if ((function == ''
                     or (self._withInternal and function in ['internal', 'crossing', 'walkingarea'])
-                    or (self._withMacroConnectors and function == 'connector')):
+                    or (self._withMacroConnectors and function == 'connector'))
+                    and self._keepEdge(attrs['id'], function, attrs.get('type', ''))):
                 prio = -1
                 if 'priority' in attrs:
                     prio = int(attrs['priority'])
@@ -796,7 +1172,11 @@ class NetReader(handler.ContentHandler):
         elif name == 'neigh' and self._currentLane is not None:
             self._currentLane.setNeigh(attrs['lane'])
         elif name == 'junction':
-            if attrs['id'][0] != ':':
+            node = self._net._id2node.get(attrs['id'])
+            if self.isPartial() and (node is None or not (node.getIncoming() or node.getOutgoing())):
+                # no edge of this junction was loaded
+                pass
+            elif attrs['id'][0] != ':':
                 intLanes = None
                 if self._withInternal:
                     intLanes = attrs["intLanes"].split(" ")
@@ -844,7 +1224,10 @@ class NetReader(handler.ContentHandler):
         elif name == 'connection' and self._withConnections and (attrs['from'][0] != ":" or self._withInternal):
             fromEdgeID = attrs['from']
             toEdgeID = attrs['to']
-            if ((self._withPedestrianConnections or not (fromEdgeID in self._net._crossings_and_walkingAreas or
+            if self.isPartial() and not (self._net.hasEdge(fromEdgeID) and self._net.hasEdge(toEdgeID) and
+                                         self._hasViaLane(attrs.get('via'))):
+                pass
+            elif ((self._withPedestrianConnections or not (fromEdgeID in self._net._crossings_and_walkingAreas or
                                                          toEdgeID in self._net._crossings_and_walkingAreas))
                 and (self._withMacroConnectors or not (fromEdgeID in self._net._macroConnectors or toEdgeID in
                                                        self._net._macroConnectors))):
@@ -875,7 +1258,7 @@ class NetReader(handler.ContentHandler):
         elif name == 'logicitem' and self._withFoes:  # deprecated
             self._net.setFoes(
                 self._currentNode, int(attrs['request']), attrs["foes"], attrs["response"])
-        elif name == 'request' and self._withFoes:
+        elif name == 'request' and self._withFoes and self._currentNode is not None:
             self._currentNode.setFoes(
                 int(attrs['index']), attrs["foes"], attrs["response"])
         # tl-logic is deprecated!!! NOTE: nevertheless, this is still used by
@@ -891,7 +1274,7 @@ class NetReader(handler.ContentHandler):
                 list(map(int, attrs['next'].split())) if 'next' in attrs else [],
                 attrs['name'] if 'name' in attrs else ""
             )
-        elif name == 'roundabout':
+        elif name == 'roundabout' and (not self.isPartial() or all(map(self._net.hasEdge, attrs['edges'].split()))):
             self._net.addRoundabout(
                 attrs['nodes'].split(), attrs['edges'].split())
         elif name == 'param':
@@ -910,6 +1293,10 @@ class NetReader(handler.ContentHandler):
         if name == 'lane':
             self._currentLane = None
         elif name == 'edge':
+            if (self._bbox is not None and self._currentEdge is not None and
+                    self._currentEdge.getFunction() not in _SPECIAL_FUNCTIONS and
+                    not self._intersectsBBox(self._currentEdge)):
+                self._dropEdge(self._currentEdge)
             self._currentEdge = None
         elif name == 'junction':
             self._currentNode = None
@@ -922,15 +1309,21 @@ class NetReader(handler.ContentHandler):
         elif self._withPhases and (name == 'tlLogic' or name == 'tl-logic'):
             self._currentProgram = None
         elif name == 'net':
+            if self.isPartial():
+                self._removeDetached()
             for edgeID, bidiID in self._bidiEdgeIDs.items():
-                self._net.getEdge(edgeID)._bidi = self._net.getEdge(bidiID)
+                if self._net.hasEdge(bidiID):
+                    self._net.getEdge(edgeID)._bidi = self._net.getEdge(bidiID)
 
     def endDocument(self):
         # set crossed edges of pedestrian crossings
         for crossingID, crossedEdgeIDs in self._crossingID2edgeIDs.items():
+            if not self._net.hasEdge(crossingID):
+                continue
             pedCrossing = self._net.getEdge(crossingID)
             for crossedEdgeID in crossedEdgeIDs:
-                pedCrossing._addCrossingEdge(self._net.getEdge(crossedEdgeID))
+                if self._net.hasEdge(crossedEdgeID):
+                    pedCrossing._addCrossingEdge(self._net.getEdge(crossedEdgeID))
 
     def getNet(self):
         return self._net
@@ -957,6 +1350,61 @@ def convertShape(shapeString):
     return cshape
 
 
+class _ConnectionGraphReader(handler.ContentHandler):
+
+    """Reads only the connections between normal edges of a network as a successor map of edge ids
+    (internal edges are not part of the map, they are kept together with their junction)"""
+
+    def __init__(self):
+        self.successors = defaultdict(set)
+
+    def startElement(self, name, attrs):
+        if name == 'connection' and attrs['from'][0] != ':':
+            self.successors[attrs['from']].add(attrs['to'])
+
+    def endElement(self, name):
+        pass
+
+
+def _parseNetFile(filename, contentHandler, useLxml):
+    try:
+        source = gzip.open(filename)
+        source.read(10)
+        source.seek(0)
+    except IOError:
+        source = filename
+    if useLxml:
+        if isinstance(source, pathlib.Path):
+            source = str(source)
+        for event, v in lxml.etree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                contentHandler.startElement(v.tag, v.attrib)
+            elif event == "end":
+                contentHandler.endElement(v.tag)
+            v.clear()  # reduce memory footprint
+    else:
+        parse(source, contentHandler)
+
+
+def _getReachableEdgeIDs(filename, seedEdges, seedDepth, useLxml):
+    """returns the ids of the edges reachable from seedEdges within seedDepth connections"""
+    reader = _ConnectionGraphReader()
+    _parseNetFile(filename, reader, useLxml)
+    if hasattr(filename, 'seek'):
+        filename.seek(0)
+    found = set(seedEdges)
+    queue = deque([(edgeID, 0) for edgeID in found])
+    while queue:
+        edgeID, depth = queue.popleft()
+        if seedDepth is not None and depth >= seedDepth:
+            continue
+        for succ in reader.successors.get(edgeID, ()):
+            if succ not in found:
+                found.add(succ)
+                queue.append((succ, depth + 1))
+    return found
+
+
 def readNet(filename, **others):
     """ load a .net.xml file
     The following named options are supported:
@@ -971,23 +1419,34 @@ def readNet(filename, **others):
         'withInternal' : import internal edges and lanes (default False)
         'withPedestrianConnections' : import connections between sidewalks, crossings (default False)
         'lxml' : set to False to use the xml.sax parser instead of the lxml parser
+        'cache' : store the parsed net in a binary cache next to the network file and
+                  load it from there as long as the network file and the options above
+                  are unchanged (default False, partially loaded networks are not cached)
+
+    The following options load only a part of the network, the other edges are
+    dropped while parsing. Junctions and their internal, crossing and walking area
+    edges are kept if at least one of their normal edges is kept, connections if both
+    of their edges (and their via lane) are kept.
+
+        'bbox' : (xmin, ymin, xmax, ymax), keep only edges with a lane whose bounding
+                 box intersects the given one
+        'edgeTypes' : keep only edges of the given types
+        'seedEdges' : keep only the given edges and the edges reachable from them
+                      (this needs an additional pass over the connections in the file)
+        'seedDepth' : maximum number of connections between a seed and a kept edge,
+                      only normal edges are counted (default unlimited)
     """
     netreader = NetReader(**others)
-    try:
-        source = gzip.open(filename)
-        source.read(10)
-        source.seek(0)
-    except IOError:
-        source = filename
-    if HAVE_LXML and others.get("lxml", True):
-        if isinstance(source, pathlib.Path):
-            source = str(source)
-        for event, v in lxml.etree.iterparse(source, events=("start", "end")):
-            if event == "start":
-                netreader.startElement(v.tag, v.attrib)
-            elif event == "end":
-                netreader.endElement(v.tag)
-            v.clear()  # reduce memory footprint
-    else:
-        parse(source, netreader)
+    useLxml = HAVE_LXML and others.get("lxml", True)
+    if others.get('seedEdges') is not None:
+        netreader._edgeIDs = _getReachableEdgeIDs(filename, others['seedEdges'], others.get('seedDepth'), useLxml)
+    useCache = (others.get('cache', False) and 'net' not in others and not hasattr(filename, 'read')
+                and not netreader.isPartial())
+    if useCache:
+        net = netcache.load(str(filename), netreader)
+        if net is not None:
+            return net
+    _parseNetFile(filename, netreader, useLxml)
+    if useCache:
+        netcache.store(netreader.getNet(), str(filename), netreader)
     return netreader.getNet()
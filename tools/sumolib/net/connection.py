@@ -31,6 +31,9 @@ class Connection:
 
     """edge connection for a sumo network"""
 
+    __slots__ = ('_from', '_to', '_fromLane', '_toLane', '_direction', '_tls', '_tlLink', '_state',
+                 '_via', '_params')
+
     def __init__(self, fromEdge, toEdge, fromLane, toLane, direction, tls, tllink, state, viaLaneID=None):
         self._from = fromEdge
         self._to = toEdge
@@ -20,13 +20,19 @@
 
 import sumolib.geomhelper
 from .connection import Connection
-from .lane import addJunctionPos
+from array import array
+from .lane import addJunctionPos, packShape, unpackShape
 
 
 class Edge:
 
     """ Edges from a sumo network """
 
+    __slots__ = ('_id', '_from', '_to', '_priority', '_lanes', '_speed', '_length', '_incoming', '_outgoing',
+                 '_crossingEdges', '_packedShape', '_packedRawShape', '_shape', '_shape3D', '_shapeWithJunctions',
+                 '_shapeWithJunctions3D', '_rawShape', '_rawShape3D', '_function', '_tls', '_name', '_type',
+                 '_params', '_bidi', '_selected')
+
     def __init__(self, id, fromN, toN, prio, function, name, edgeType=''):
         self._id = id
         self._from = fromN
@@ -42,12 +48,10 @@ class Edge:
         self._incoming = {}
         self._outgoing = {}
         self._crossingEdges = []
-        self._shape = None
-        self._shapeWithJunctions = None
-        self._shape3D = None
-        self._shapeWithJunctions3D = None
-        self._rawShape = None
-        self._rawShape3D = None
+        # packed x,y,z coordinates (see packShape), built from the lanes on first access
+        self._packedShape = None
+        self._packedRawShape = None
+        self._clearShapes()
         self._function = function
         self._tls = None
         self._name = name
@@ -102,7 +106,17 @@ class Edge:
             self._crossingEdges.append(edge)
 
     def setRawShape(self, shape):
-        self._rawShape3D = shape
+        self._packedRawShape = packShape(shape)
+        self._clearShapes()
+
+    def _clearShapes(self):
+        # lists of tuples unpacked on first access
+        self._shape = None
+        self._shape3D = None
+        self._shapeWithJunctions = None
+        self._shapeWithJunctions3D = None
+        self._rawShape = None
+        self._rawShape3D = None
 
     def getID(self):
         return self._id
@@ -132,28 +146,44 @@ class Edge:
 
     def getRawShape(self):
         """Return the shape that was used in netconvert for building this edge (2D)."""
-        if self._shape is None:
-            self.rebuildShape()
+        if self._rawShape is None:
+            if self._packedShape is None:
+                self.rebuildShape()
+            self._rawShape = unpackShape(self._packedRawShape, 2)
         return self._rawShape
 
     def getRawShape3D(self):
         """Return the shape that was used in netconvert for building this edge (3D)."""
-        if self._shape is None:
-            self.rebuildShape()
+        if self._rawShape3D is None:
+            if self._packedShape is None:
+                self.rebuildShape()
+            self._rawShape3D = unpackShape(self._packedRawShape)
         return self._rawShape3D
 
     def getShape(self, includeJunctions=False):
         """Return the 2D shape that is the average of all lane shapes (segment-wise)"""
-        if self._shape is None:
-            self.rebuildShape()
         if includeJunctions:
+            if self._shapeWithJunctions is None:
+                self._shapeWithJunctions = [(x, y) for x, y, z in self.getShape3D(True)]  # noqa
             return self._shapeWithJunctions
+        if self._shape is None:
+            if self._packedShape is None:
+                self.rebuildShape()
+            self._shape = unpackShape(self._packedShape, 2)
         return self._shape
 
     def getShape3D(self, includeJunctions=False):
-        if self._shape is None:
-            self.rebuildShape()
+        if self._shape3D is None:
+            if self._packedShape is None:
+                self.rebuildShape()
+            self._shape3D = unpackShape(self._packedShape)
         if includeJunctions:
+            if self._shapeWithJunctions3D is None:
+                if self._function in ["crossing", "walkingarea"]:
+                    self._shapeWithJunctions3D = self._shape3D
+                else:
+                    self._shapeWithJunctions3D = addJunctionPos(self._shape3D, self._from.getCoord3D(),
+                                                                self._to.getCoord3D())
             return self._shapeWithJunctions3D
         return self._shape3D
 
@@ -193,38 +223,21 @@ class Edge:
         return self._selected
 
     def rebuildShape(self):
+        self._clearShapes()
         numLanes = len(self._lanes)
         if numLanes % 2 == 1:
-            self._shape3D = self._lanes[int(numLanes / 2)].getShape3D()
+            self._packedShape = self._lanes[int(numLanes / 2)]._packedShape
         else:
-            self._shape3D = []
-            minLen = -1
-            for _lane in self._lanes:
-                if minLen == -1 or minLen > len(_lane.getShape()):
-                    minLen = len(_lane.getShape())
-            for i in range(minLen):
-                x = 0.
-                y = 0.
-                z = 0.
-                for _lane in self._lanes:
-                    x += _lane.getShape3D()[i][0]
-                    y += _lane.getShape3D()[i][1]
-                    z += _lane.getShape3D()[i][2]
-                self._shape3D.append((x / float(numLanes), y / float(numLanes), z / float(numLanes)))
+            # segment-wise average of the packed lane coordinates
+            laneShapes = [_lane._packedShape for _lane in self._lanes]
+            minLen = min([len(shape) for shape in laneShapes]) if laneShapes else 0
+            self._packedShape = array('d', [sum([shape[i] for shape in laneShapes]) / float(numLanes)
+                                        for i in range(minLen)])
 
         if self._function in ["crossing", "walkingarea"]:
-            self._shapeWithJunctions3D = self._shape3D
-            self._rawShape3D = self._shape3D
-        else:
-            self._shapeWithJunctions3D = addJunctionPos(self._shape3D,
-                                                        self._from.getCoord3D(), self._to.getCoord3D())
-            if self._rawShape3D == []:
-                self._rawShape3D = [self._from.getCoord3D(), self._to.getCoord3D()]
-
-        # 2d - versions
-        self._shape = [(x, y) for x, y, z in self._shape3D]  # noqa
-        self._shapeWithJunctions = [(x, y) for x, y, z in self._shapeWithJunctions3D]  # noqa
-        self._rawShape = [(x, y) for x, y, z in self._rawShape3D]  # noqa
+            self._packedRawShape = self._packedShape
+        elif not self._packedRawShape:
+            self._packedRawShape = packShape([self._from.getCoord3D(), self._to.getCoord3D()])
 
     def getLength(self):
         return self._lanes[0].getLength()
@@ -20,7 +20,9 @@
 
 
 import sumolib.geomhelper
+from array import array
 from functools import reduce
+from itertools import chain
 
 # taken from sumo/src/utils/common/SUMOVehicleClass.cpp
 SUMO_VEHICLE_CLASSES = set([
@@ -106,15 +108,34 @@ def addJunctionPos(shape, fromPos, toPos):
     return result
 
 
+def packShape(shape):
+    """Packs a list of x,y,z points into a flat array of doubles."""
+    return array('d', chain.from_iterable(shape))
+
+
+def unpackShape(packed, dim=3):
+    """Returns the points of a packed shape as a list of 3d (or 2d) tuples."""
+    if dim == 2:
+        return list(zip(packed[0::3], packed[1::3]))
+    return list(zip(packed[0::3], packed[1::3], packed[2::3]))
+
+
 class Lane:
 
     """ Lanes from a sumo network """
 
+    __slots__ = ('_edge', '_speed', '_length', '_width', '_packedShape', '_shape', '_shape3D',
+                 '_shapeWithJunctions', '_shapeWithJunctions3D', '_outgoing', '_params',
+                 '_allowed', '_neigh', '_selected', '_acceleration')
+
     def __init__(self, edge, speed, length, width, allow, disallow, acceleration):
         self._edge = edge
         self._speed = speed
         self._length = length
         self._width = width
+        # packed x,y,z coordinates, see packShape
+        self._packedShape = None
+        # lists of tuples unpacked on first access
         self._shape = None
         self._shape3D = None
         self._shapeWithJunctions = None
@@ -140,14 +161,18 @@ class Lane:
         """Set the shape of the lane
 
         shape must be a list containing x,y,z coords as numbers
-        to represent the shape of the lane
+        to represent the shape of the lane. The coordinates are stored
+        packed and unpacked by the shape getters on first access.
         """
         for pp in shape:
             if len(pp) != 3:
                 raise ValueError('shape point must consist of x,y,z')
 
-        self._shape3D = shape
-        self._shape = [(x, y) for x, y, z in shape]
+        self._packedShape = packShape(shape)
+        self._shape = None
+        self._shape3D = None
+        self._shapeWithJunctions = None
+        self._shapeWithJunctions3D = None
 
     def getShape(self, includeJunctions=False):
         """Returns the shape of the lane in 2d.
@@ -165,6 +190,10 @@ class Lane:
         shape of the lane is returned.
         """
 
+        if self._shape is None:
+            if self._packedShape is None:
+                return None
+            self._shape = unpackShape(self._packedShape, 2)
         if includeJunctions and not self._edge.isSpecial():
             if self._shapeWithJunctions is None:
                 self._shapeWithJunctions = addJunctionPos(self._shape,
@@ -190,11 +219,14 @@ class Lane:
         shape of the lane is returned.
         """
 
+        if self._shape3D is None:
+            if self._packedShape is None:
+                return None
+            self._shape3D = unpackShape(self._packedShape)
         if includeJunctions and not self._edge.isSpecial():
             if self._shapeWithJunctions3D is None:
                 self._shapeWithJunctions3D = addJunctionPos(self._shape3D,
-                                                            self._edge.getFromNode(
-                                                            ).getCoord3D(),
+                                                            self._edge.getFromNode().getCoord3D(),
                                                             self._edge.getToNode().getCoord3D())
             return self._shapeWithJunctions3D
         return self._shape3D
@@ -0,0 +1,237 @@
+# Eclipse SUMO, Simulation of Urban MObility; see https://eclipse.dev/sumo
+# Copyright (C) 2008-2025 German Aerospace Center (DLR) and others.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License 2.0 which is available at
+# https://www.eclipse.org/legal/epl-2.0/
+# This Source Code may also be made available under the following Secondary
+# Licenses when the conditions for such availability set forth in the Eclipse
+# Public License 2.0 are satisfied: GNU General Public License, version 2
+# or later which is available at
+# https://www.gnu.org/licenses/old-licenses/gpl-2.0-standalone.html
+# SPDX-License-Identifier: EPL-2.0 OR GPL-2.0-or-later
+
+# @file    netcache.py
+# @date    2026-10-18
+
+"""
+Binary cache for networks loaded with readNet.
+
+The object graph of a Net is stored with pickle next to the network file.
+The cache file name contains a digest of the reader options and the file
+itself starts with a digest of the network file content, so a cache is only
+used for the same network read with the same options.
+
+Pickling the object graph directly recurses along the network topology which
+exceeds the recursion limit for larger networks. Therefore all network objects
+are first written as empty shells in one flat list per class and their
+attributes follow column-wise (one list per attribute and class) where every
+reference to a network object is resolved from the pickle memo. Loading assigns
+each column with a single map over the slot descriptor of the attribute.
+The attribute names of every class are stored as well and a cache whose names
+differ from the current classes (written by another version of sumolib) is
+treated as invalid instead of being restored into objects with another layout.
+"""
+
+from __future__ import print_function
+from __future__ import absolute_import
+import gc
+import hashlib
+import io
+import os
+import pickle
+import sys
+import warnings
+from array import array
+from collections import deque
+from itertools import repeat
+
+CACHE_VERSION = 3
+# attributes of the NetReader which change the resulting network
+READER_OPTIONS = ('_withPhases', '_latestProgram', '_withConnections', '_withFoes',
+                  '_withInternal', '_withPedestrianConnections', '_withMacroConnectors')
+# attributes which are rebuilt on demand and are not stored
+TRANSIENT_ATTRIBUTES = ('_rtreeEdges', '_rtreeLanes', '_segmentIndices', '_proj', '_shortestPathCache',
+                        '_shape', '_shape3D', '_shapeWithJunctions', '_shapeWithJunctions3D', '_rawShape',
+                        '_rawShape3D')
+
+
+# values which never reference network objects
+_ATOMIC_TYPES = set([str, bytes, int, float, bool, type(None), array])
+
+
+def _isNetObject(obj):
+    return type(obj).__module__.startswith(__package__)
+
+
+def _slotNames(cls):
+    for c in cls.__mro__:
+        slots = c.__dict__.get('__slots__', ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for name in slots:
+            if name not in ('__dict__', '__weakref__'):
+                yield name
+
+
+def _attributeNames(cls):
+    """returns the names of the slots of cls followed by '__dict__' if its instances have one"""
+    names = list(_slotNames(cls))
+    if cls.__dictoffset__:
+        names.append('__dict__')
+    return names
+
+
+def _collectObjects(net):
+    """returns all network objects reachable from net (without recursion)"""
+    seen = set()
+    objects = []
+    # stored attributes per class of network objects
+    attributes = {}
+    stack = [net]
+    while stack:
+        obj = stack.pop()
+        objType = type(obj)
+        if objType in _ATOMIC_TYPES or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif _isNetObject(obj):
+            objects.append(obj)
+            names = attributes.get(objType)
+            if names is None:
+                names = attributes[objType] = [n for n in _attributeNames(objType) if n not in TRANSIENT_ATTRIBUTES]
+            for name in names:
+                if name == '__dict__':
+                    stack.extend([v for k, v in obj.__dict__.items() if k not in TRANSIENT_ATTRIBUTES])
+                else:
+                    stack.append(getattr(obj, name, None))
+    return objects
+
+
+def _getColumns(names, objects):
+    """returns one list of values per attribute name for the given objects (None for transient ones)"""
+    columns = []
+    for name in names:
+        if name in TRANSIENT_ATTRIBUTES:
+            columns.append(None)
+        elif name == '__dict__':
+            columns.append([dict([(k, None if k in TRANSIENT_ATTRIBUTES else v) for k, v in obj.__dict__.items()])
+                            for obj in objects])
+        else:
+            columns.append([getattr(obj, name, None) for obj in objects])
+    return columns
+
+
+def _setDict(obj, state):
+    obj.__dict__.update(state)
+
+
+class _ShellPickler(pickle.Pickler):
+
+    def __init__(self, file, shells):
+        pickle.Pickler.__init__(self, file, pickle.HIGHEST_PROTOCOL)
+        self._shells = shells
+
+    def reducer_override(self, obj):
+        if id(obj) in self._shells:
+            self._shells.discard(id(obj))
+            return object.__new__, (type(obj),)
+        return NotImplemented
+
+
+def _dump(net, f):
+    objects = _collectObjects(net)
+    groups = {}
+    for obj in objects:
+        groups.setdefault(type(obj), []).append(obj)
+    # the net is the first object of the first group
+    groups = list(groups.values())
+    layouts = []
+    for group in groups:
+        names = _attributeNames(type(group[0]))
+        layouts.append((names, _getColumns(names, group)))
+    _ShellPickler(f, set(map(id, objects))).dump((groups, layouts))
+
+
+def _load(f):
+    """returns the stored net or None if the attribute layout of a class has changed since storing"""
+    # the restored objects are all alive, garbage collection passes while unpickling only cost time
+    gcEnabled = gc.isenabled()
+    gc.disable()
+    try:
+        groups, layouts = pickle.load(f)
+    finally:
+        if gcEnabled:
+            gc.enable()
+    for objects, (names, _) in zip(groups, layouts):
+        if names != _attributeNames(type(objects[0])):
+            return None
+    for objects, (names, columns) in zip(groups, layouts):
+        cls = type(objects[0])
+        for name, column in zip(names, columns):
+            if name == '__dict__':
+                deque(map(_setDict, objects, column), 0)
+            else:
+                deque(map(getattr(cls, name).__set__, objects, repeat(None) if column is None else column), 0)
+    return groups[0][0]
+
+
+def dumps(net):
+    """returns the net serialized as bytes (e.g. for sending it to worker processes)"""
+    f = io.BytesIO()
+    _dump(net, f)
+    return f.getvalue()
+
+
+def loads(data):
+    """returns the net serialized by dumps"""
+    return _load(io.BytesIO(data))
+
+
+def getCacheFile(filename, netreader):
+    key = repr([(o, bool(getattr(netreader, o))) for o in READER_OPTIONS])
+    return "%s.%s.cache" % (filename, hashlib.sha1(key.encode()).hexdigest()[:10])
+
+
+def getContentDigest(filename):
+    digest = hashlib.sha1()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load(filename, netreader):
+    """returns the cached net for filename and the options of netreader or None if there is no valid cache"""
+    cacheFile = getCacheFile(filename, netreader)
+    if not os.path.exists(cacheFile):
+        return None
+    try:
+        with open(cacheFile, 'rb') as f:
+            version, contentDigest = pickle.load(f)
+            if version != CACHE_VERSION or contentDigest != getContentDigest(filename):
+                return None
+            return _load(f)
+    except Exception as e:
+        warnings.warn("Could not read network cache '%s' (%s)" % (cacheFile, e))
+        return None
+
+
+def store(net, filename, netreader):
+    """writes the cache for net which was read from filename by netreader"""
+    cacheFile = getCacheFile(filename, netreader)
+    tmpFile = "%s.%s.tmp" % (cacheFile, os.getpid())
+    try:
+        with open(tmpFile, 'wb') as f:
+            pickle.dump((CACHE_VERSION, getContentDigest(filename)), f, pickle.HIGHEST_PROTOCOL)
+            _dump(net, f)
+        # atomic, so concurrent readers (e.g. workers of a sweep) never see a partial cache
+        os.replace(tmpFile, cacheFile)
+    except Exception as e:
+        print("Warning: Could not write network cache '%s' (%s)" % (cacheFile, e), file=sys.stderr)
+        if os.path.exists(tmpFile):
+            os.remove(tmpFile)
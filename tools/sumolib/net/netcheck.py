@@ -27,12 +27,14 @@ It needs one parameter, the SUMO net (.net.xml).
 - if option --right-of-way is set, it checks for problems with right of way rules
 - if option --short-tls-edges is set, a selection file for short edges (< 15m)
   incoming to a traffic light is written (see #16014)
-- by default it tests whether the network is (weakly) connected.
+- by default it tests whether the network is (weakly) connected,
+  with option --strongly-connected it computes strongly connected components.
 """
 from __future__ import absolute_import
 from __future__ import print_function
 import os
 import sys
+from itertools import chain
 THIS_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(os.path.join(THIS_DIR, '..'))
 from sumolib.options import ArgumentParser  # noqa
@@ -57,6 +59,9 @@ def parse_args():
                     help="Write output to file(s) as a loadable selection")
     op.add_argument("--ignore-connections", action="store_true", default=False,
                     help="Assume full connectivity at each node when computing all connected components")
+    op.add_argument("--strongly-connected", action="store_true", default=False, dest="stronglyConnected",
+                    help="Compute strongly connected components (following the connections) " +
+                    "instead of weakly connected ones")
     op.add_argument("-l", "--vclass", help="Include only edges allowing vClass")
     op.add_argument("--component-output", type=op.file, default=None,
                     help=("Write components of disconnected network to file - not compatible " +
@@ -72,35 +77,114 @@ def parse_args():
 
 
 def getWeaklyConnected(net, vclass=None, ignore_connections=False):
+    """Returns the weakly connected components as sorted lists of edge ids
+
+    Edges not allowing vclass are ignored. If ignore_connections is set, all edges
+    sharing a node are considered to be connected.
+    """
+    edges = net.getEdges()
+    index = dict((e, i) for i, e in enumerate(edges))
+    allowed = [vclass is None or e.allows(vclass) for e in edges]
+    # union-find over the edges (and nodes if connections are ignored)
+    parent = list(range(len(edges)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i = find(i)
+        j = find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    if ignore_connections:
+        nodeIndex = {}
+        for i, e in enumerate(edges):
+            if allowed[i]:
+                for n in (e.getFromNode(), e.getToNode()):
+                    if n not in nodeIndex:
+                        nodeIndex[n] = len(parent)
+                        parent.append(len(parent))
+                    union(i, nodeIndex[n])
+    else:
+        for i, e in enumerate(edges):
+            if allowed[i]:
+                for n in chain(e.getOutgoing(), e.getIncoming()):
+                    j = index.get(n)
+                    if j is not None and allowed[j]:
+                        union(i, j)
+    components = {}
+    for i, e in enumerate(edges):
+        if allowed[i]:
+            components.setdefault(find(i), []).append(e.getID())
+    return [sorted(component) for component in components.values()]
+
+
+def getStronglyConnected(net, vclass=None):
+    """Returns the strongly connected components as sorted lists of edge ids
+
+    Only connections between lanes allowing vclass are followed (in both directions
+    for pedestrians, as in Net.getReachable). Edges not allowing vclass are ignored.
+    """
+    edges = net.getEdges()
+    index = dict((e, i) for i, e in enumerate(edges))
+    allowed = [vclass is None or e.allows(vclass) for e in edges]
+    successors = [[] for e in edges]
+    for i, e in enumerate(edges):
+        if not allowed[i]:
+            continue
+        for conn in chain(*e.getOutgoing().values()):
+            if vclass is None or (conn.getFromLane().allows(vclass) and conn.getToLane().allows(vclass)):
+                j = index.get(conn.getTo())
+                if j is not None and allowed[j]:
+                    successors[i].append(j)
+                    if vclass == "pedestrian":
+                        successors[j].append(i)
+    # iterative version of Tarjan's algorithm
+    order = [-1] * len(edges)
+    low = [0] * len(edges)
+    onStack = [False] * len(edges)
+    stack = []
     components = []
-    edgesLeft = set(net.getEdges())
-    queue = list()
-    while len(edgesLeft) != 0:
-        component = set()
-        queue.append(edgesLeft.pop())
-        while not len(queue) == 0:
-            edge = queue.pop(0)
-            if vclass is None or edge.allows(vclass):
-                component.add(edge.getID())
-                if ignore_connections:
-                    for n in (edge.getFromNode().getOutgoing() +
-                              edge.getFromNode().getIncoming() +
-                              edge.getToNode().getOutgoing() +
-                              edge.getToNode().getIncoming()):
-                        if n in edgesLeft:
-                            queue.append(n)
-                            edgesLeft.remove(n)
-                else:
-                    for n in edge.getOutgoing():
-                        if n in edgesLeft:
-                            queue.append(n)
-                            edgesLeft.remove(n)
-                    for n in edge.getIncoming():
-                        if n in edgesLeft:
-                            queue.append(n)
-                            edgesLeft.remove(n)
-        if component:
-            components.append(sorted(component))
+    counter = 0
+    for root in range(len(edges)):
+        if not allowed[root] or order[root] != -1:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        onStack[root] = True
+        work = [(root, 0)]
+        while work:
+            v, pos = work[-1]
+            if pos < len(successors[v]):
+                work[-1] = (v, pos + 1)
+                w = successors[v][pos]
+                if order[w] == -1:
+                    order[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    onStack[w] = True
+                    work.append((w, 0))
+                elif onStack[w]:
+                    low[v] = min(low[v], order[w])
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                low[u] = min(low[u], low[v])
+            if low[v] == order[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    onStack[w] = False
+                    component.append(edges[w].getID())
+                    if w == v:
+                        break
+                components.append(sorted(component))
     return components
 
 
@@ -180,8 +264,11 @@ if __name__ == "__main__":
     elif options.shortTlsEdges:
         checkShortTLSEdges(net, options)
     else:
-        components = getWeaklyConnected(
-            net, options.vclass, options.ignore_connections)
+        if options.stronglyConnected:
+            components = getStronglyConnected(net, options.vclass)
+        else:
+            components = getWeaklyConnected(
+                net, options.vclass, options.ignore_connections)
         if len(components) != 1:
             print("Warning! Net is not connected.")
 
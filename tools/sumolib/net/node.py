@@ -18,11 +18,16 @@
 # @author  Jakob Erdmann
 # @date    2011-11-28
 
+from .lane import packShape, unpackShape
+
 
 class Node:
 
     """ Nodes from a sumo network """
 
+    __slots__ = ('_id', '_type', '_coord', '_incoming', '_outgoing', '_foes', '_prohibits',
+                 '_incLanes', '_intLanes', '_packedShape', '_shape', '_shape3D', '_fringe', '_params', '_selected')
+
     def __init__(self, id, type, coord, incLanes, intLanes=None):
         self._id = id
         self._type = type
@@ -33,8 +38,11 @@ class Node:
         self._prohibits = {}
         self._incLanes = incLanes
         self._intLanes = intLanes
-        self._shape3D = None
+        # packed x,y,z coordinates, see packShape
+        self._packedShape = None
+        # lists of tuples unpacked on first access
         self._shape = None
+        self._shape3D = None
         self._fringe = None
         self._params = {}
         self._selected = False
@@ -51,8 +59,9 @@ class Node:
         for pp in shape:
             if len(pp) != 3:
                 raise ValueError('shape point must consist of x,y,z')
-        self._shape3D = shape
-        self._shape = [(x, y) for x, y, z in shape]
+        self._packedShape = packShape(shape)
+        self._shape = None
+        self._shape3D = None
 
     def getShape(self):
         """Returns the shape of the node in 2d.
@@ -64,6 +73,8 @@ class Node:
         If no shape is defined in the xml, an empty list will be returned.
         """
 
+        if self._shape is None and self._packedShape is not None:
+            self._shape = unpackShape(self._packedShape, 2)
         return self._shape
 
     def getShape3D(self):
@@ -76,6 +87,8 @@ class Node:
         If no shape is defined in the xml, an empty list will be returned.
         """
 
+        if self._shape3D is None and self._packedShape is not None:
+            self._shape3D = unpackShape(self._packedShape)
         return self._shape3D
 
     def addOutgoing(self, edge):
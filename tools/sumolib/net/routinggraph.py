@@ -0,0 +1,334 @@
+# Eclipse SUMO, Simulation of Urban MObility; see https://eclipse.dev/sumo
+# Copyright (C) 2008-2025 German Aerospace Center (DLR) and others.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License 2.0 which is available at
+# https://www.eclipse.org/legal/epl-2.0/
+# This Source Code may also be made available under the following Secondary
+# Licenses when the conditions for such availability set forth in the Eclipse
+# Public License 2.0 are satisfied: GNU General Public License, version 2
+# or later which is available at
+# https://www.gnu.org/licenses/old-licenses/gpl-2.0-standalone.html
+# SPDX-License-Identifier: EPL-2.0 OR GPL-2.0-or-later
+
+# @file    routinggraph.py
+# @date    2026-10-18
+
+"""
+Array based routing graph exported from a sumolib.net.Net.
+
+The normal edges of the network (no internal, crossing or walking area edges)
+are numbered and the connections between them are stored in compressed sparse
+row (CSR) form: the links leaving edge i are succ[indptr[i]:indptr[i + 1]].
+There is one link per connection, so a link carries the vehicle classes allowed
+on both connected lanes as bitmask and the cost of the via lanes of its connection.
+Routing on these arrays gives the same costs as Net.getOptimalPath without chasing
+the Edge and Connection objects.
+"""
+
+from __future__ import absolute_import
+import heapq
+import math
+
+import numpy as np
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+    HAVE_SCIPY = True
+except ImportError:
+    HAVE_SCIPY = False
+
+from .lane import SUMO_VEHICLE_CLASSES
+
+VCLASSES = sorted(SUMO_VEHICLE_CLASSES)
+VCLASS_BITS = dict([(vClass, 1 << i) for i, vClass in enumerate(VCLASSES)])
+ALL_VCLASSES = (1 << len(VCLASSES)) - 1
+
+# name and dtype of the arrays of a graph, per edge and per link
+ARRAYS = (('length', np.float64), ('speed', np.float64), ('permissions', np.uint64), ('bidi', np.int32),
+          ('x', np.float64), ('y', np.float64), ('indptr', np.int32), ('succ', np.int32),
+          ('linkPermissions', np.uint64), ('viaLength', np.float64), ('viaTime', np.float64))
+
+
+def getPermissionMask(allowed):
+    """Returns the bitmask for a set of vehicle classes."""
+    mask = 0
+    for vClass in allowed:
+        mask |= VCLASS_BITS.get(vClass, 0)
+    return mask
+
+
+class RoutingGraph:
+
+    """Immutable CSR graph of the normal edges of a network"""
+
+    def __init__(self, edgeIDs, arrays, heuristicFactors):
+        self._edgeIDs = list(edgeIDs)
+        self._index = dict([(edgeID, i) for i, edgeID in enumerate(self._edgeIDs)])
+        for name, dtype in ARRAYS:
+            array = np.asarray(arrays[name], dtype=dtype)
+            array.flags.writeable = False
+            setattr(self, name, array)
+        self._heuristicFactors = tuple(heuristicFactors)
+        self._weights = {}
+        self._weightLists = {}
+        self._matrices = {}
+        self._lists = None
+        self._shm = None
+
+    @classmethod
+    def fromNet(cls, net):
+        """Builds the graph for the normal edges of net."""
+        edges = net.getEdges(withInternal=False)
+        index = dict([(e, i) for i, e in enumerate(edges)])
+        arrays = dict([(name, []) for name, _ in ARRAYS])
+        arrays['indptr'].append(0)
+        heuristicFactors = [1e400, 1e400]
+        for e in edges:
+            arrays['length'].append(e.getLength())
+            arrays['speed'].append(e.getSpeed())
+            arrays['permissions'].append(getPermissionMask(set().union(*[lane.getPermissions()
+                                                                         for lane in e.getLanes()])))
+            arrays['bidi'].append(index.get(e.getBidi(), -1))
+            fromCoord = e.getFromNode().getCoord()
+            toCoord = e.getToNode().getCoord()
+            arrays['x'].append(toCoord[0])
+            arrays['y'].append(toCoord[1])
+            dist = math.hypot(toCoord[0] - fromCoord[0], toCoord[1] - fromCoord[1])
+            if dist > 0:
+                heuristicFactors[0] = min(heuristicFactors[0], e.getLength() / dist)
+                heuristicFactors[1] = min(heuristicFactors[1], e.getLength() / e.getSpeed() / dist)
+            for e2, conns in e.getOutgoing().items():
+                if e2 not in index:
+                    continue
+                for conn in conns:
+                    arrays['succ'].append(index[e2])
+                    arrays['linkPermissions'].append(getPermissionMask(conn.getFromLane().getPermissions()) &
+                                                     getPermissionMask(conn.getToLane().getPermissions()))
+                    viaLength = viaTime = 0.
+                    if net.hasInternal:
+                        viaPath, cost = net.getInternalPath([conn])
+                        if viaPath is not None:
+                            viaLength = cost
+                            viaTime = net.getInternalPath([conn], fastest=True)[1]
+                    arrays['viaLength'].append(viaLength)
+                    arrays['viaTime'].append(viaTime)
+            arrays['indptr'].append(len(arrays['succ']))
+        return cls([e.getID() for e in edges], arrays,
+                   [f if f < 1e400 else 0. for f in heuristicFactors])
+
+    def __getstate__(self):
+        return (self._edgeIDs, dict([(name, getattr(self, name)) for name, _ in ARRAYS]), self._heuristicFactors)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def toSharedMemory(self):
+        """Copies all arrays into a single shared memory block.
+
+        Returns the SharedMemory object, which the caller has to keep open while the graph
+        is used and to unlink afterwards, and a picklable handle for fromSharedMemory.
+        """
+        from multiprocessing import shared_memory
+        layout = []
+        offset = 0
+        for name, dtype in ARRAYS:
+            nbytes = getattr(self, name).nbytes
+            layout.append((name, offset, len(getattr(self, name))))
+            # keep every array aligned to 8 bytes
+            offset += (nbytes + 7) // 8 * 8
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype), (_, start, size) in zip(ARRAYS, layout):
+            np.ndarray(size, dtype=dtype, buffer=shm.buf, offset=start)[:] = getattr(self, name)
+        return shm, (shm.name, layout, self._edgeIDs, self._heuristicFactors)
+
+    @classmethod
+    def fromSharedMemory(cls, handle):
+        """Returns a graph whose arrays are views on the shared memory described by handle."""
+        from multiprocessing import shared_memory
+        name, layout, edgeIDs, heuristicFactors = handle
+        shm = shared_memory.SharedMemory(name=name)
+        dtypes = dict(ARRAYS)
+        arrays = dict([(array, np.ndarray(size, dtype=dtypes[array], buffer=shm.buf, offset=start))
+                       for array, start, size in layout])
+        graph = cls(edgeIDs, arrays, heuristicFactors)
+        graph._shm = shm
+        return graph
+
+    def getEdgeNumber(self):
+        return len(self._edgeIDs)
+
+    def getEdgeID(self, index):
+        return self._edgeIDs[index]
+
+    def getEdgeIndex(self, edgeID):
+        return self._index[edgeID]
+
+    def getEdgeCosts(self, fastest=False):
+        """Returns the cost for passing each edge (length or travel time)."""
+        return self.length / self.speed if fastest else self.length
+
+    def getWeights(self, fastest=False, vClass=None, reversalPenalty=0):
+        """Returns the cost of each link including the cost of the target edge,
+        the via lanes and the reversal penalty. Links which do not allow vClass cost inf."""
+        key = (fastest, vClass, reversalPenalty)
+        if key not in self._weights:
+            source = np.repeat(np.arange(len(self._edgeIDs), dtype=np.int32), np.diff(self.indptr))
+            weights = self.getEdgeCosts(fastest)[self.succ] + (self.viaTime if fastest else self.viaLength)
+            if reversalPenalty:
+                weights = weights + np.where(self.bidi[source] == self.succ, reversalPenalty, 0.)
+            if vClass is not None and vClass != "ignoring":
+                mask = np.uint64(VCLASS_BITS.get(vClass, 0))
+                weights = np.where(self.linkPermissions & mask != 0, weights, np.inf)
+            weights.flags.writeable = False
+            self._weights[key] = weights
+        return self._weights[key]
+
+    def _getLists(self):
+        # python lists are considerably faster than numpy arrays for scalar access in the search loops
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.succ.tolist(), self.x.tolist(), self.y.tolist())
+        return self._lists
+
+    def _getWeightList(self, fastest, vClass, reversalPenalty):
+        key = (fastest, vClass, reversalPenalty)
+        if key not in self._weightLists:
+            self._weightLists[key] = self.getWeights(fastest, vClass, reversalPenalty).tolist()
+        return self._weightLists[key]
+
+    def _search(self, source, targets, weights, maxCost, heuristic=None):
+        """Dijkstra's algorithm (or A* for a single target and a heuristic factor) on the link weights.
+
+        Returns the dicts of costs and predecessors and the set of settled edges.
+        """
+        indptr, succ, xs, ys = self._getLists()
+        if heuristic:
+            target = targets[0]
+            tx = xs[target]
+            ty = ys[target]
+        remaining = set(targets) if targets is not None else None
+        dist = {source: 0.}
+        pred = {source: -1}
+        seen = set()
+        q = [(0., 0., source)]
+        while q:
+            priority, cost, e1 = heapq.heappop(q)
+            if e1 in seen:
+                continue
+            seen.add(e1)
+            if remaining is not None:
+                remaining.discard(e1)
+                if not remaining:
+                    break
+            if priority > maxCost:
+                break
+            for i in range(indptr[e1], indptr[e1 + 1]):
+                e2 = succ[i]
+                newCost = cost + weights[i]
+                if newCost < dist.get(e2, 1e400):
+                    dist[e2] = newCost
+                    pred[e2] = e1
+                    if heuristic:
+                        heapq.heappush(q, (newCost + heuristic * math.hypot(xs[e2] - tx, ys[e2] - ty),
+                                           newCost, e2))
+                    else:
+                        heapq.heappush(q, (newCost, newCost, e2))
+        return dist, pred, seen
+
+    def _finish(self, source, target, path, cost, fastest, includeFromToCost):
+        # same adjustments for the first and the last edge as in Net.getOptimalPath
+        speedFrom = self.speed[source] if fastest else 1.0
+        if includeFromToCost:
+            return float(cost + self.length[source] / speedFrom)
+        return float(cost - (self.length[target] if len(path) > 1 else 0.) / speedFrom)
+
+    def _buildPath(self, pred, target):
+        path = []
+        while target != -1:
+            path.append(target)
+            target = pred[target]
+        return path[::-1]
+
+    def getOptimalPath(self, fromID, toID, fastest=False, maxCost=1e400, vClass=None, reversalPenalty=0,
+                       includeFromToCost=True, algorithm="astar"):
+        """
+        Finds the optimal path between two edges (given by id) on the arrays.
+        Returns a pair of a tuple of edge ids and the cost or None and 1e400 if there is no
+        path within maxCost. The cost is defined as for Net.getOptimalPath.
+        The algorithm may be "astar" or "dijkstra".
+        """
+        source = self._index[fromID]
+        target = self._index[toID]
+        weights = self._getWeightList(fastest, vClass, reversalPenalty)
+        if algorithm == "astar":
+            heuristic = self._heuristicFactors[1 if fastest else 0]
+        elif algorithm == "dijkstra":
+            heuristic = None
+        else:
+            raise ValueError("Unknown routing algorithm '%s'" % algorithm)
+        dist, pred, seen = self._search(source, [target], weights, maxCost, heuristic)
+        if target not in seen:
+            return None, 1e400
+        path = self._buildPath(pred, target)
+        cost = self._finish(source, target, path, dist[target], fastest, includeFromToCost)
+        return tuple([self._edgeIDs[i] for i in path]), cost
+
+    def _getMatrix(self, fastest, vClass, reversalPenalty):
+        # sparse edge x edge matrix of the allowed link weights for scipy.sparse.csgraph
+        key = (fastest, vClass, reversalPenalty)
+        if key not in self._matrices:
+            weights = self.getWeights(fastest, vClass, reversalPenalty)
+            n = len(self._edgeIDs)
+            allowed = np.isfinite(weights)
+            rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.indptr))[allowed]
+            cols = self.succ[allowed]
+            weights = weights[allowed]
+            # parallel links (several connections between two edges) would be summed up, keep the cheapest
+            order = np.lexsort((weights, cols, rows))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (rows[order][1:] != rows[order][:-1]) | (cols[order][1:] != cols[order][:-1])
+            keep = order[first]
+            self._matrices[key] = csr_matrix((weights[keep], (rows[keep], cols[keep])), shape=(n, n))
+        return self._matrices[key]
+
+    def getShortestPathTree(self, fromID, fastest=False, maxCost=1e400, vClass=None, reversalPenalty=0):
+        """
+        Computes the costs from the given edge to all edges (without the adjustments for the first
+        and the last edge) and the predecessor of each edge on its optimal path.
+        Returns two arrays indexed by edge index, unreachable edges have cost inf and predecessor -1.
+        Uses scipy.sparse.csgraph if available.
+        """
+        source = self._index[fromID]
+        n = len(self._edgeIDs)
+        if HAVE_SCIPY:
+            dist, pred = dijkstra(self._getMatrix(fastest, vClass, reversalPenalty), indices=source,
+                                  return_predecessors=True, limit=maxCost if maxCost < 1e400 else np.inf)
+            pred[pred < 0] = -1
+            return dist, pred.astype(np.int32)
+        distDict, predDict, seen = self._search(source, None, self._getWeightList(fastest, vClass, reversalPenalty),
+                                                maxCost)
+        dist = np.full(n, np.inf)
+        pred = np.full(n, -1, dtype=np.int32)
+        for e in seen:
+            dist[e] = distDict[e]
+            pred[e] = predDict[e]
+        return dist, pred
+
+    def getOptimalPaths(self, fromID, toIDs, fastest=False, maxCost=1e400, vClass=None, reversalPenalty=0,
+                        includeFromToCost=True):
+        """
+        Finds the optimal paths from one edge to several edges (given by id) with a single search.
+        Returns a dict mapping each id of toIDs to the pair of path and cost as returned by getOptimalPath.
+        """
+        source = self._index[fromID]
+        dist, pred = self.getShortestPathTree(fromID, fastest, maxCost, vClass, reversalPenalty)
+        result = {}
+        for toID in toIDs:
+            target = self._index[toID]
+            if dist[target] == np.inf or dist[target] > maxCost:
+                result[toID] = (None, 1e400)
+                continue
+            path = self._buildPath(pred, target)
+            cost = self._finish(source, target, path, float(dist[target]), fastest, includeFromToCost)
+            result[toID] = (tuple([self._edgeIDs[i] for i in path]), cost)
+        return result
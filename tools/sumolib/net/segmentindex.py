@@ -0,0 +1,127 @@
+# Eclipse SUMO, Simulation of Urban MObility; see https://eclipse.dev/sumo
+# Copyright (C) 2008-2025 German Aerospace Center (DLR) and others.
+# This program and the accompanying materials are made available under the
+# terms of the Eclipse Public License 2.0 which is available at
+# https://www.eclipse.org/legal/epl-2.0/
+# This Source Code may also be made available under the following Secondary
+# Licenses when the conditions for such availability set forth in the Eclipse
+# Public License 2.0 are satisfied: GNU General Public License, version 2
+# or later which is available at
+# https://www.gnu.org/licenses/old-licenses/gpl-2.0-standalone.html
+# SPDX-License-Identifier: EPL-2.0 OR GPL-2.0-or-later
+
+# @file    segmentindex.py
+# @date    2026-10-18
+
+"""
+Vectorized neighbor queries for many points at once.
+
+All segments of a list of shapes (e.g. the edge or lane shapes of a network) are
+flattened into arrays. For a query the segments are bucketed into a uniform grid
+(with their bounding boxes enlarged by the query radius) and every point is only
+paired with the segments of its grid cell. The distances of all pairs are then
+computed with sumolib.geomhelper.distancePointsToSegments which performs the same
+floating point operations as sumolib.geomhelper.distancePointToLine.
+"""
+
+from __future__ import absolute_import
+
+import numpy as np
+
+from ..geomhelper import distancePointsToSegments
+
+# maximum number of points handled at once to bound the memory of the candidate pairs
+CHUNK_SIZE = 1 << 16
+
+
+class SegmentIndex:
+
+    """Flattened segments of a list of shapes for batch distance queries"""
+
+    def __init__(self, shapes):
+        x1 = []
+        y1 = []
+        x2 = []
+        y2 = []
+        owner = []
+        for i, shape in enumerate(shapes):
+            for (ax, ay), (bx, by) in zip(shape[:-1], shape[1:]):
+                x1.append(ax)
+                y1.append(ay)
+                x2.append(bx)
+                y2.append(by)
+                owner.append(i)
+        self.x1 = np.array(x1, dtype=float)
+        self.y1 = np.array(y1, dtype=float)
+        self.x2 = np.array(x2, dtype=float)
+        self.y2 = np.array(y2, dtype=float)
+        self.owner = np.array(owner, dtype=np.int64)
+        self.numShapes = len(shapes)
+        self._grid = None
+
+    def _getGrid(self, r):
+        """Returns the grid of segment bounding boxes enlarged by r (sorted cell keys and segment ids)."""
+        if self._grid is not None and self._grid[0] == r:
+            return self._grid
+        xmin = np.minimum(self.x1, self.x2) - r
+        xmax = np.maximum(self.x1, self.x2) + r
+        ymin = np.minimum(self.y1, self.y2) - r
+        ymax = np.maximum(self.y1, self.y2) + r
+        extent = np.maximum(xmax - xmin, ymax - ymin)
+        cellSize = max(float(np.median(extent)) if len(extent) else 1., 1e-3)
+        cx0 = np.floor(xmin / cellSize).astype(np.int64)
+        cx1 = np.floor(xmax / cellSize).astype(np.int64)
+        cy0 = np.floor(ymin / cellSize).astype(np.int64)
+        cy1 = np.floor(ymax / cellSize).astype(np.int64)
+        ny = cy1 - cy0 + 1
+        counts = (cx1 - cx0 + 1) * ny
+        segments = np.repeat(np.arange(len(counts)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cellX = cx0[segments] + local // ny[segments]
+        cellY = cy0[segments] + local % ny[segments]
+        origin = (int(cellX.min()), int(cellY.min())) if len(cellX) else (0, 0)
+        height = int(cellY.max()) - origin[1] + 1 if len(cellY) else 1
+        keys = (cellX - origin[0]) * height + (cellY - origin[1])
+        order = np.argsort(keys, kind='stable')
+        self._grid = (r, cellSize, origin, height, keys[order], segments[order])
+        return self._grid
+
+    def query(self, points, r):
+        """Finds all shapes within distance r of each point.
+
+        points is a sequence or array of shape (N, 2). Returns three arrays with one entry per
+        (point, shape) pair: the point index, the shape index and the minimum distance of the
+        shape to the point (< r). The pairs are sorted by point and shape.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        results = [self._query(points[start:start + CHUNK_SIZE], r, start)
+                   for start in range(0, len(points), CHUNK_SIZE)]
+        if not results:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+        return tuple(np.concatenate(parts) for parts in zip(*results))
+
+    def _query(self, points, r, offset):
+        _, cellSize, origin, height, keys, segments = self._getGrid(r)
+        cellX = np.floor(points[:, 0] / cellSize).astype(np.int64) - origin[0]
+        cellY = np.floor(points[:, 1] / cellSize).astype(np.int64) - origin[1]
+        pointKeys = np.where((cellY >= 0) & (cellY < height), cellX * height + cellY, -1)
+        lo = np.searchsorted(keys, pointKeys, side='left')
+        hi = np.searchsorted(keys, pointKeys, side='right')
+        counts = hi - lo
+        pointIdx = np.repeat(np.arange(len(points)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        segIdx = segments[np.repeat(lo, counts) + local]
+        dist = distancePointsToSegments(points[pointIdx, 0], points[pointIdx, 1],
+                                        self.x1[segIdx], self.y1[segIdx], self.x2[segIdx], self.y2[segIdx])
+        close = dist < r
+        pointIdx = pointIdx[close]
+        shapeIdx = self.owner[segIdx[close]]
+        dist = dist[close]
+        # minimum distance per (point, shape)
+        order = np.lexsort((dist, shapeIdx, pointIdx))
+        pointIdx = pointIdx[order]
+        shapeIdx = shapeIdx[order]
+        dist = dist[order]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (pointIdx[1:] != pointIdx[:-1]) | (shapeIdx[1:] != shapeIdx[:-1])
+        return pointIdx[first] + offset, shapeIdx[first], dist[first]
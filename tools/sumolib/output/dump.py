@@ -20,6 +20,17 @@ from __future__ import absolute_import
 import collections
 from xml.sax import parse, handler
 
+from .. import xml as sumoxml
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+# number of edge / lane elements which are buffered before they are converted to arrays
+CHUNK_SIZE = 1 << 16
+
 
 class DumpReader(handler.ContentHandler):
 
@@ -91,3 +102,161 @@ def readDump(file, attrsToCollect, edgesToCollect=None):
     dump = DumpReader(attrsToCollect, edgesToCollect)
     parse(file, dump)
     return dump
+
+
+class DumpMatrix:
+
+    """Edge / lane based meandata as one dense (interval x edge) NumPy matrix per attribute.
+
+    Column j of every matrix belongs to the edge (or lane) edgeIDs[j], edgeIndex maps the ids
+    to the columns. As with DumpReader, entries of edges which are missing in an interval
+    (or miss the attribute) are 0 and values of elements mapped to the same id are summed.
+    """
+
+    def __init__(self, intervalBegins, intervalEnds, edgeIDs, values, counts):
+        self._intervalBegins = intervalBegins
+        self._intervalEnds = intervalEnds
+        self.edgeIDs = edgeIDs
+        self.edgeIndex = dict([(e, i) for i, e in enumerate(edgeIDs)])
+        self._values = values
+        self._counts = counts
+
+    def get(self, what):
+        """Returns the matrix of the attribute with one row per interval and one column per edge."""
+        return self._values[what]
+
+    def getCounts(self, what):
+        """Returns the number of elements which contributed to each entry of the attribute matrix."""
+        return self._counts[what]
+
+    def getEdgeValues(self, what, edgeID):
+        """Returns the values of the attribute for the given edge in all intervals."""
+        return self._values[what][:, self.edgeIndex[edgeID]]
+
+    def getIntervalStarts(self):
+        return self._intervalBegins
+
+    def getIntervalEnds(self):
+        return self._intervalEnds
+
+    def join(self, what, how):
+        """Joins all intervals of the given attributes into a single row.
+
+        how is either "sum" or "average" where the average of an edge is taken over the
+        intervals in which it has the attribute (as in DumpReader).
+        """
+        if how not in ("sum", "average"):
+            raise ValueError("Unknown join '%s'." % how)
+        for a in what:
+            total = self._values[a].sum(axis=0, keepdims=True)
+            present = (self._counts[a] > 0).sum(axis=0, keepdims=True)
+            if how == "average":
+                total = np.divide(total, present, out=np.zeros_like(total), where=present > 0)
+            self._values[a] = total
+            self._counts[a] = present
+
+    def toDicts(self, what):
+        """Returns the attribute as a list of dicts (one per row) in the format of DumpReader.get."""
+        result = []
+        for row, count in zip(self._values[what], self._counts[what]):
+            present = np.flatnonzero(count)
+            result.append(dict(zip([self.edgeIDs[j] for j in present], row[present].tolist())))
+        return result
+
+
+def _scanAttributes(reprog, quotedprog, attrtext):
+    """returns the attributes of the tag text, the (slower) quoted pattern handles single quotes"""
+    if "'" in attrtext:
+        return dict([(name, value) for name, _, value in quotedprog.findall(attrtext)])
+    return dict(reprog.findall(attrtext))
+
+
+def readDumpMatrix(file, attrsToCollect, edgesToCollect=None):
+    """
+    Reads the given attributes of edge and lane based meandata into a DumpMatrix.
+    attrsToCollect and edgesToCollect are lists or dicts as for readDump
+    (a dict maps the attribute / edge in the file to the name in the result).
+    If edgesToCollect is given, the matrix columns follow its (unique) target ids,
+    otherwise the order in which the edges appear in the file.
+    @Note: The file is scanned with the fast parser of sumolib.xml, no element tree is built
+    (attribute values may be in single or double quotes but must not contain '>').
+    """
+    if not HAVE_NUMPY:
+        raise ImportError("readDumpMatrix requires numpy")
+    if not isinstance(attrsToCollect, dict):
+        attrsToCollect = dict([(a, a) for a in attrsToCollect])
+    if edgesToCollect is not None and not isinstance(edgesToCollect, dict):
+        edgesToCollect = dict([(e, e) for e in edgesToCollect])
+    edgeIndex = {}
+    if edgesToCollect is not None:
+        for target in edgesToCollect.values():
+            edgeIndex.setdefault(target, len(edgeIndex))
+    attrs = list(attrsToCollect)
+    names = list(collections.OrderedDict.fromkeys(attrsToCollect.values()))
+    attrprog = sumoxml._attribute_pattern(["id"] + attrs)
+    quotedattrprog = sumoxml._quoted_attribute_pattern(["id"] + attrs)
+    intervalprog = sumoxml._quoted_attribute_pattern(["begin", "end"])
+    tagprog = sumoxml._tag_pattern(["interval", "edge", "lane"])
+
+    intervalBegins = []
+    intervalEnds = []
+    # (interval, edge) position and raw attribute values of every element
+    cells = []
+    rows = []
+    chunks = []
+
+    def flush():
+        if rows:
+            columns = [np.array([np.nan if v is None else v for v in col], dtype=float) for col in zip(*rows)]
+            chunks.append((np.array(cells, dtype=np.int64), columns))
+        del cells[:]
+        del rows[:]
+
+    xmlfile, close_source = sumoxml._check_file_like(file)
+    try:
+        for block in sumoxml._iter_blocks(xmlfile):
+            for slash, name, attrtext in tagprog.findall(block):
+                if slash:
+                    continue
+                if name == "interval":
+                    values = dict([(n, v) for n, _, v in intervalprog.findall(attrtext)])
+                    intervalBegins.append(float(values["begin"]))
+                    intervalEnds.append(float(values.get("end", "nan")))
+                    continue
+                values = _scanAttributes(attrprog, quotedattrprog, attrtext)
+                # skip elements without collected attributes (e.g. edges which only enclose lanes)
+                if len(values) < 2 or not intervalBegins:
+                    continue
+                id = values.get("id")
+                if edgesToCollect is not None:
+                    if id not in edgesToCollect:
+                        continue
+                    id = edgesToCollect[id]
+                elif id is None:
+                    continue
+                cells.append((len(intervalBegins) - 1, edgeIndex.setdefault(id, len(edgeIndex))))
+                rows.append(tuple(map(values.get, attrs)))
+                if len(rows) == CHUNK_SIZE:
+                    flush()
+        flush()
+    finally:
+        if close_source:
+            xmlfile.close()
+
+    shape = (len(intervalBegins), len(edgeIndex))
+    values = dict([(n, np.zeros(shape)) for n in names])
+    counts = dict([(n, np.zeros(shape, dtype=np.int32)) for n in names])
+    if chunks:
+        cellArray = np.concatenate([c for c, _ in chunks])
+        flat = cellArray[:, 0] * shape[1] + cellArray[:, 1]
+        for i, a in enumerate(attrs):
+            attrValues = np.concatenate([columns[i] for _, columns in chunks])
+            present = ~np.isnan(attrValues)
+            target = attrsToCollect[a]
+            values[target] += np.bincount(flat[present], attrValues[present],
+                                          minlength=shape[0] * shape[1]).reshape(shape)
+            counts[target] += np.bincount(flat[present], minlength=shape[0] * shape[1]).reshape(shape)
+    edgeIDs = [None] * len(edgeIndex)
+    for e, i in edgeIndex.items():
+        edgeIDs[i] = e
+    return DumpMatrix(np.array(intervalBegins), np.array(intervalEnds), edgeIDs, values, counts)
@@ -97,159 +97,205 @@ def _prefix_keyword(name, warn=False):
     return result
 
 
-def compound_object(element_name, attrnames, warn=False, sort=True):
-    """return a class which delegates bracket access to an internal dict.
-       Missing attributes are delegated to the child dict for convenience.
-       @note: Care must be taken when child nodes and attributes have the same names"""
-    class CompoundObject():
-        _original_fields = sorted(attrnames) if sort else tuple(attrnames)
-        _fields = [_prefix_keyword(a, warn) for a in _original_fields]
-
-        def __init__(self, values, child_dict=None, text=None, child_list=None):
-            for name, val in zip(self._fields, values):
-                self.__dict__[name] = val
-            self._child_dict = child_dict if child_dict else {}
-            self.name = element_name
-            self._text = text
-            self._child_list = child_list if child_list else []
-
-        def getAttributes(self):
-            return [(k, getattr(self, k)) for k in self._fields]
-
-        def hasAttribute(self, name):
-            return name in self._fields
-
-        def getAttribute(self, name):
-            if self.hasAttribute(name):
-                return self.__dict__[name]
-            raise AttributeError
-
-        def getAttributeSecure(self, name, default=None):
-            if self.hasAttribute(name):
-                return self.__dict__[name]
-            return default
-
-        def setAttribute(self, name, value):
+class CompoundObject(object):
+
+    """Base class of the classes returned by compound_object.
+       The attributes are stored in slots of the subclass, the containers for the
+       child elements are only created when the first child is added."""
+
+    __slots__ = ('_child_dict', '_child_list', '_text', '__dict__')
+    _original_fields = ()
+    _fields = ()
+    _warn = False
+    name = None
+
+    def __init__(self, values, child_dict=None, text=None, child_list=None):
+        for name, val in zip(self._fields, values):
+            object.__setattr__(self, name, val)
+        object.__setattr__(self, '_child_dict', child_dict if child_dict else None)
+        object.__setattr__(self, '_text', text)
+        object.__setattr__(self, '_child_list', child_list if child_list else None)
+
+    def _children(self):
+        if self._child_dict is None:
+            object.__setattr__(self, '_child_dict', {})
+        if self._child_list is None:
+            object.__setattr__(self, '_child_list', [])
+        return self._child_dict, self._child_list
+
+    def getAttributes(self):
+        return [(k, getattr(self, k)) for k in self._fields]
+
+    def hasAttribute(self, name):
+        return name in self._fields
+
+    def getAttribute(self, name):
+        if self.hasAttribute(name):
+            return getattr(self, name)
+        raise AttributeError
+
+    def getAttributeSecure(self, name, default=None):
+        if self.hasAttribute(name):
+            return getattr(self, name)
+        return default
+
+    def setAttribute(self, name, value):
+        if name not in self._original_fields:
+            # the field lists are shared by all instances of the class, so extend a copy
+            self._original_fields = tuple(self._original_fields) + (name,)
+            self._fields = tuple(self._fields) + (_prefix_keyword(name, self._warn),)
+        object.__setattr__(self, _prefix_keyword(name, self._warn), value)
+
+    def hasChild(self, name):
+        return self._child_dict is not None and name in self._child_dict
+
+    def getChild(self, name):
+        return self[name]
+
+    def addChild(self, name, attrs=None, sortAttrs=True):
+        if attrs is None:
+            attrs = {}
+        clazz = compound_object(name, attrs.keys(), sort=sortAttrs)
+        child = clazz([attrs.get(a) for a in clazz._original_fields])
+        child_dict, child_list = self._children()
+        child_dict.setdefault(name, []).append(child)
+        child_list.append(child)
+        return child
+
+    def removeChild(self, child):
+        self._child_dict[child.name].remove(child)
+        self._child_list.remove(child)
+
+    def setChildList(self, childs):
+        child_dict, child_list = self._children()
+        for c in child_list:
+            child_dict[c.name].remove(c)
+        for c in childs:
+            child_dict.setdefault(c.name, []).append(c)
+        object.__setattr__(self, '_child_list', childs)
+
+    def getChildList(self, withComments=False):
+        if withComments:
+            return self._children()[1]
+        else:
+            return [c for c in self._child_list or () if not c.isComment()]
+
+    def getText(self):
+        return self._text
+
+    def setText(self, text):
+        object.__setattr__(self, '_text', text)
+
+    def isComment(self):
+        return "function Comment" in str(self.name)
+
+    def getComments(self):
+        if not supports_comments:
+            sys.stderr.write("Comment parsing is only supported with version 3.8 or higher by sumolib.xml\n")
+        for name, children in (self._child_dict or {}).items():
+            if "function Comment" in str(name):
+                return [c.getText() for c in children]
+        return []
+
+    def __getattr__(self, name):
+        if name[:2] != "__" and name not in CompoundObject.__slots__:
+            child_dict = self._child_dict
+            return None if child_dict is None else child_dict.get(name, None)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        child_dict = getattr(self, '_child_dict', None)
+        if name != "_child_dict" and child_dict and name in child_dict:
+            # this could be optimized by using the child_list only if there are different children
+            for c in child_dict[name]:
+                self._child_list.remove(c)
+            child_dict[name] = value
+            for c in value:
+                self._child_list.append(c)
+        else:
+            object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        if self._child_dict and name in self._child_dict:
+            for c in self._child_dict[name]:
+                self._child_list.remove(c)
+            del self._child_dict[name]
+        else:
             if name not in self._original_fields:
-                if isinstance(self._original_fields, tuple):
-                    tempList = list(self._original_fields)
-                    tempList.append(name)
-                    self._original_fields = tuple(tempList)
-                else:
-                    self._original_fields.append(name)
-                self._fields.append(_prefix_keyword(name, warn))
-            self.__dict__[_prefix_keyword(name, warn)] = value
-
-        def hasChild(self, name):
-            return name in self._child_dict
-
-        def getChild(self, name):
-            return self._child_dict[name]
-
-        def addChild(self, name, attrs=None, sortAttrs=True):
-            if attrs is None:
-                attrs = {}
-            clazz = compound_object(name, attrs.keys(), sort=sortAttrs)
-            child = clazz([attrs.get(a) for a in (sorted(attrs.keys()) if sortAttrs else attrs.keys())])
-            self._child_dict.setdefault(name, []).append(child)
-            self._child_list.append(child)
-            return child
-
-        def removeChild(self, child):
-            self._child_dict[child.name].remove(child)
-            self._child_list.remove(child)
-
-        def setChildList(self, childs):
-            for c in self._child_list:
-                self._child_dict[c.name].remove(c)
-            for c in childs:
-                self._child_dict.setdefault(c.name, []).append(c)
-            self._child_list = childs
-
-        def getChildList(self, withComments=False):
+                raise AttributeError(name)
+            attr = _prefix_keyword(name, False)
+            try:
+                object.__delattr__(self, attr)
+            except AttributeError:
+                pass
+            self._original_fields = tuple([f for f in self._original_fields if f != name])
+            self._fields = tuple([f for f in self._fields if f != attr])
+
+    def __getitem__(self, name):
+        if self._child_dict is None:
+            raise KeyError(name)
+        return self._child_dict[name]
+
+    def __str__(self):
+        nodeText = '' if self._text is None else ",text=%s" % self._text
+        return "<%s,child_dict=%s%s>" % (self.getAttributes(), dict(self._child_dict or {}), nodeText)
+
+    def toXML(self, initialIndent="", indent="    ", withComments=False):
+        fields = ['%s="%s"' % (self._original_fields[i], getattr(self, k))
+                  for i, k in enumerate(self._fields) if getattr(self, k) is not None and
+                  # see #3454
+                  '{' not in self._original_fields[i]]
+        if self.isComment():
             if withComments:
-                return self._child_list
+                return initialIndent + "<!-- %s -->\n" % self._text
             else:
-                return [c for c in self._child_list if not c.isComment()]
-
-        def getText(self):
-            return self._text
-
-        def setText(self, text):
-            self._text = text
-
-        def isComment(self):
-            return "function Comment" in str(self.name)
-
-        def getComments(self):
-            if not supports_comments:
-                sys.stderr.write("Comment parsing is only supported with version 3.8 or higher by sumolib.xml\n")
-            for name, children in self._child_dict.items():
-                if "function Comment" in str(name):
-                    return [c.getText() for c in children]
-            return []
-
-        def __getattr__(self, name):
-            if name[:2] != "__":
-                return self._child_dict.get(name, None)
-            raise AttributeError
-
-        def __setattr__(self, name, value):
-            if name != "_child_dict" and name in self._child_dict:
-                # this could be optimized by using the child_list only if there are different children
-                for c in self._child_dict[name]:
-                    self._child_list.remove(c)
-                self._child_dict[name] = value
-                for c in value:
-                    self._child_list.append(c)
-            else:
-                self.__dict__[name] = value
+                return ""
+        if not self._child_dict and self._text is None:
+            return initialIndent + "<%s %s/>\n" % (self.name, " ".join(fields))
+        else:
+            s = initialIndent + "<%s %s>\n" % (self.name, " ".join(fields))
+            for c in self._child_list or ():
+                s += c.toXML(initialIndent + indent, withComments=withComments)
+            if self._text is not None and self._text.strip():
+                s += self._text.strip(" ")
+            return s + "%s</%s>\n" % (initialIndent, self.name)
 
-        def __delattr__(self, name):
-            if name in self._child_dict:
-                for c in self._child_dict[name]:
-                    self._child_list.remove(c)
-                del self._child_dict[name]
-            else:
-                if name in self.__dict__:
-                    del self.__dict__[name]
-                self._original_fields.remove(name)
-                self._fields.remove(_prefix_keyword(name, False))
-
-        def __getitem__(self, name):
-            return self._child_dict[name]
-
-        def __str__(self):
-            nodeText = '' if self._text is None else ",text=%s" % self._text
-            return "<%s,child_dict=%s%s>" % (self.getAttributes(), dict(self._child_dict), nodeText)
-
-        def toXML(self, initialIndent="", indent="    ", withComments=False):
-            fields = ['%s="%s"' % (self._original_fields[i], getattr(self, k))
-                      for i, k in enumerate(self._fields) if getattr(self, k) is not None and
-                      # see #3454
-                      '{' not in self._original_fields[i]]
-            if self.isComment():
-                if withComments:
-                    return initialIndent + "<!-- %s -->\n" % self._text
-                else:
-                    return ""
-            if not self._child_dict and self._text is None:
-                return initialIndent + "<%s %s/>\n" % (self.name, " ".join(fields))
-            else:
-                s = initialIndent + "<%s %s>\n" % (self.name, " ".join(fields))
-                for c in self._child_list:
-                    s += c.toXML(initialIndent + indent, withComments=withComments)
-                if self._text is not None and self._text.strip():
-                    s += self._text.strip(" ")
-                return s + "%s</%s>\n" % (initialIndent, self.name)
+    def __repr__(self):
+        return str(self)
 
-        def __repr__(self):
-            return str(self)
+    def __lt__(self, other):
+        return str(self) < str(other)
 
-        def __lt__(self, other):
-            return str(self) < str(other)
 
-    return CompoundObject
+# compound object classes by (element name, attribute names, warn)
+_compound_classes = {}
+
+
+def compound_object(element_name, attrnames, warn=False, sort=True):
+    """return a class which delegates bracket access to an internal dict.
+       Missing attributes are delegated to the child dict for convenience.
+       The classes are cached by element name and (sorted) attribute names.
+       @note: Care must be taken when child nodes and attributes have the same names"""
+    original_fields = tuple(sorted(attrnames) if sort else attrnames)
+    key = (element_name, original_fields, warn)
+    clazz = _compound_classes.get(key)
+    if clazz is None:
+        fields = tuple([_prefix_keyword(a, warn) for a in original_fields])
+        # attributes clashing with the methods (or each other) are kept in the instance dict
+        slots = []
+        for f in fields:
+            if f not in slots and not hasattr(CompoundObject, f):
+                slots.append(f)
+        clazz = type("CompoundObject", (CompoundObject,), {
+            '__slots__': tuple(slots),
+            '_original_fields': original_fields,
+            '_fields': fields,
+            '_warn': warn,
+            # comments are named by the ElementTree Comment function which must not become a method
+            'name': staticmethod(element_name) if callable(element_name) else element_name,
+        })
+        _compound_classes[key] = clazz
+    return clazz
 
 
 def parselines(xmlline, element_name, element_attrs=None, attr_conversions=None,
@@ -332,29 +378,38 @@ def _IDENTITY(x):
 
 def _get_compound_object(node, element_types, element_name, element_attrs, attr_conversions,
                          heterogeneous, warn, ignoreXmlns):
-    if element_name not in element_types or heterogeneous:
-        # initialized the compound_object type from the first encountered #
-        # element
-        attrnames = element_attrs.get(element_name, node.keys())
+    attrnames = element_attrs.get(element_name)
+    if attrnames is None and heterogeneous:
+        key = (element_name, tuple(node.keys()))
+    else:
+        key = element_name
+    clazz = element_types.get(key)
+    if clazz is None:
+        # initialized the compound_object type from the first encountered
+        # element (with this attribute set if heterogeneous)
+        if attrnames is None:
+            attrnames = node.keys()
         if len(attrnames) != len(set(attrnames)):
             raise Exception(
                 "non-unique attributes %s for element '%s'" % (attrnames, element_name))
-        element_types[element_name] = compound_object(
-            element_name, attrnames, warn)
+        clazz = element_types[key] = compound_object(element_name, attrnames, warn)
     # prepare children
-    child_dict = {}
-    child_list = []
+    child_dict = None
+    child_list = None
     if len(node) > 0:
+        child_dict = {}
+        child_list = []
         for c in node:
             tag = _handle_namespace(c.tag, ignoreXmlns)
             child = _get_compound_object(c, element_types, tag, element_attrs, attr_conversions,
                                          heterogeneous, warn, ignoreXmlns)
             child_dict.setdefault(tag, []).append(child)
             child_list.append(child)
-    attrnames = element_types[element_name]._original_fields
-    return element_types[element_name](
-        [attr_conversions.get(a, _IDENTITY)(node.get(a)) for a in attrnames],
-        child_dict, node.text, child_list)
+    if attr_conversions:
+        values = [attr_conversions.get(a, _IDENTITY)(node.get(a)) for a in clazz._original_fields]
+    else:
+        values = [node.get(a) for a in clazz._original_fields]
+    return clazz(values, child_dict, node.text, child_list)
 
 
 def create_document(root_element_name, attrs=None, schema=None):
@@ -382,21 +437,78 @@ def average(elements, attrname):
         raise Exception("average of 0 elements is not defined")
 
 
-def _createRecordAndPattern(element_name, attrnames, warn, optional, extra=None):
+_COMMENT = re.compile("<!--.*?-->", re.DOTALL)
+
+
+def _attribute_pattern(attrnames):
+    """return a regex whose findall yields (name, value) for the given (double quoted) attributes"""
+    return re.compile('\\s(%s)\\s*=\\s*"([^"]*)"' % '|'.join([re.escape(a) for a in attrnames]))
+
+
+def _quoted_attribute_pattern(attrnames):
+    """return a regex whose findall yields (name, quote, value) for the given attributes
+       in single or double quotes"""
+    return re.compile('\\s(%s)\\s*=\\s*(["\'])(.*?)\\2' % '|'.join([re.escape(a) for a in attrnames]), re.DOTALL)
+
+
+def _createRecordAndScanner(element_name, attrnames, warn, optional, extra=None):
+    """return the record type and a function which builds a record from the attribute text
+       of an element (or None if a required attribute is missing)"""
     if isinstance(attrnames, str):
         attrnames = [attrnames]
+    attrnames = list(attrnames)
     prefixedAttrnames = [_prefix_keyword(a, warn) for a in attrnames]
-    if optional:
-        pattern = ''.join(['<%s' % element_name] +
-                          ['(\\s+%s="(?P<%s>[^"]*?)")?' % a for a in zip(attrnames, prefixedAttrnames)])
-    else:
-        pattern = '.*'.join(['<%s' % element_name] +
-                            ['\\s+%s="([^"]*)"' % attr for attr in attrnames])
     if extra is not None:
         prefixedAttrnames += [_prefix_keyword(a, warn) for a in extra]
     Record = namedtuple(_prefix_keyword(element_name, warn), prefixedAttrnames)
-    reprog = re.compile(pattern)
-    return Record, reprog
+    reprog = _attribute_pattern(attrnames)
+
+    def scan(attrtext, *extraValues):
+        values = dict(reprog.findall(attrtext))
+        if not optional and len(values) < len(attrnames):
+            return None
+        return Record(*(tuple(map(values.get, attrnames)) + extraValues))
+    return Record, scan
+
+
+def _iter_blocks(stream, block_size=1 << 22):
+    """
+    Yields the content of the stream in blocks without comments where every block
+    ends with the end of a tag (so no tag is split between blocks).
+    """
+    rest = ""
+    while True:
+        data = stream.read(block_size)
+        text = _COMMENT.sub("", rest + data)
+        if not data:
+            if text:
+                yield text
+            return
+        # keep an unfinished comment and an unfinished tag for the next block
+        cut = text.find("<!--")
+        cut = text.rfind(">", 0, len(text) if cut < 0 else cut) + 1
+        rest = text[cut:]
+        yield text[:cut]
+
+
+def _tag_pattern(element_names):
+    """return a regex whose finditer yields (end tag slash, name, attribute text) for the given elements"""
+    return re.compile('<(/?)(%s)(?=[\\s/>])([^>]*)>' % '|'.join([re.escape(n) for n in element_names]))
+
+
+def _iter_tags(stream, element_names):
+    """
+    Yields (name, attribute text, is empty) for the start tags and (name, None, True)
+    for the end tags of the given elements in the order of the stream.
+    Elements may share a line and tags may span multiple lines.
+    """
+    reprog = _tag_pattern(element_names)
+    for block in _iter_blocks(stream):
+        for slash, name, attrtext in reprog.findall(block):
+            if slash:
+                yield name, None, True
+            else:
+                yield name, attrtext, attrtext[-1:] == "/"
 
 
 def _open(xmlfile, encoding="utf8"):
@@ -410,42 +522,24 @@ def _open(xmlfile, encoding="utf8"):
     return xmlfile
 
 
-def _comment_filter(stream):
-    """
-    Filters given stream for comments. Is used by parse_fast and parse_fast_nested
-    """
-    in_comment = False
-    for line in stream:
-        if "<!--" in line or in_comment:
-            if "-->" in line:
-                yield re.sub(".*-->" if in_comment else "<!--.*-->", "", line)
-                in_comment = False
-            elif not in_comment:
-                yield re.sub("<!--.*", "", line)
-                in_comment = True
-        else:
-            yield line
-
-
 def parse_fast(xmlfile, element_name, attrnames, warn=False, optional=False, encoding="utf8"):
     """
     Parses the given attrnames from all elements with element_name
-    @Note: The element must be on its own line and the attributes must appear in
-    the given order. If you set "optional=True", missing attributes will be set to None.
-    Make sure that you list all (potential) attributes (even the ones you are not interested in)
-    in this case. You can only leave out attributes at the end.
+    The attributes may appear in any order and the element may contain further attributes.
+    Elements which miss one of the attributes are skipped unless you set "optional=True",
+    then missing attributes will be set to None.
+    @Note: No element tree is built, the file is only scanned for the tags of element_name
+    (the tags must not contain '>' in attribute values).
     @Example: parse_fast('plain.edg.xml', 'edge', ['id', 'speed'])
     """
-    Record, reprog = _createRecordAndPattern(element_name, attrnames, warn, optional)
+    _, scan = _createRecordAndScanner(element_name, attrnames, warn, optional)
     xmlfile, close_source = _check_file_like(xmlfile)
     try:
-        for line in _comment_filter(xmlfile):
-            m = reprog.search(line)
-            if m:
-                if optional:
-                    yield Record(**m.groupdict())
-                else:
-                    yield Record(*m.groups())
+        for name, attrtext, _ in _iter_tags(xmlfile, [element_name]):
+            if attrtext is not None:
+                record = scan(attrtext)
+                if record is not None:
+                    yield record
     finally:
         if close_source:
             xmlfile.close()
@@ -456,34 +550,27 @@ def parse_fast_nested(xmlfile, element_name, attrnames, element_name2, attrnames
     """
     Parses the given attrnames from all elements with element_name
     And attrnames2 from element_name2 where element_name2 is a child element of element_name
-    If you set "optional=True", missing attributes will be set to None.
-    Make sure that you list all (potential) attributes (even the ones you are not interested in)
-    in this case. You can only leave out attributes at the end.
-    @Note: The element must be on its own line and the attributes must appear in
-    the given order.
+    The attributes may appear in any order and the elements may contain further attributes.
+    Elements which miss one of the attributes are skipped unless you set "optional=True",
+    then missing attributes will be set to None.
+    @Note: No element tree is built, the file is only scanned for the tags of both elements.
     @Example: parse_fast_nested('fcd.xml', 'timestep', ['time'], 'vehicle', ['id', 'speed', 'lane']):
     """
-    Record, reprog = _createRecordAndPattern(element_name, attrnames, warn, optional)
-    Record2, reprog2 = _createRecordAndPattern(element_name2, attrnames2, warn, optional)
+    _, scan = _createRecordAndScanner(element_name, attrnames, warn, optional)
+    _, scan2 = _createRecordAndScanner(element_name2, attrnames2, warn, optional)
     record = None
     xmlfile, close_source = _check_file_like(xmlfile)
     try:
-        for line in _comment_filter(xmlfile):
-            m2 = reprog2.search(line)
-            if record and m2:
-                if optional:
-                    yield record, Record2(**m2.groupdict())
-                else:
-                    yield record, Record2(*m2.groups())
+        for name, attrtext, empty in _iter_tags(xmlfile, [element_name, element_name2]):
+            if name == element_name2 and name != element_name:
+                if record is not None and attrtext is not None:
+                    record2 = scan2(attrtext)
+                    if record2 is not None:
+                        yield record, record2
+            elif attrtext is not None and not empty:
+                record = scan(attrtext)
             else:
-                m = reprog.search(line)
-                if m:
-                    if optional:
-                        record = Record(**m.groupdict())
-                    else:
-                        record = Record(*m.groups())
-                elif element_name in line:
-                    record = None
+                record = None
     finally:
         if close_source:
             xmlfile.close()
@@ -496,52 +583,248 @@ def parse_fast_structured(xmlfile, element_name, attrnames, nested,
     Unlike parse_fast_nested this function can handle multiple different child elements and
     returns objects where the child elements can be accessed by name (e.g. timestep.vehicle[0])
     as with the parse method. The returned object is not modifiable though.
-    If you set "optional=True", missing attributes will be set to None.
-    Make sure that you list all (potential) attributes (even the ones you are not interested in)
-    in this case. You can only leave out attributes at the end.
-    @Note: Every element must be on its own line and the attributes must appear in the given order.
+    The attributes may appear in any order and the elements may contain further attributes.
+    Elements which miss one of the attributes are skipped unless you set "optional=True",
+    then missing attributes will be set to None.
+    @Note: No element tree is built, the file is only scanned for the tags of the elements.
     @Example: parse_fast_structured('fcd.xml', 'timestep', ['time'],
                                     {'vehicle': ['id', 'speed', 'lane'], 'person': ['id', 'speed', 'edge']}):
     """
-    Record, reprog = _createRecordAndPattern(element_name, attrnames, warn, optional, nested.keys())
-    re2 = [(elem,) + _createRecordAndPattern(elem, attr, warn, optional) for elem, attr in nested.items()]
-    finalizer = "</%s>" % element_name
+    _, scan = _createRecordAndScanner(element_name, attrnames, warn, optional, nested.keys())
+    scanners = dict([(elem, _createRecordAndScanner(elem, attr, warn, optional)[1]) for elem, attr in nested.items()])
     record = None
     xmlfile, close_source = _check_file_like(xmlfile)
     try:
-        for line in _comment_filter(xmlfile):
-            if record:
-                for name2, Record2, reprog2 in re2:
-                    m2 = reprog2.search(line)
-                    if m2:
-                        if optional:
-                            inner = Record2(**m2.groupdict())
-                        else:
-                            inner = Record2(*m2.groups())
-                        getattr(record, name2).append(inner)
-                        break
-                else:
-                    if finalizer in line:
-                        yield record
-                        record = None
-            else:
-                m = reprog.search(line)
-                if m:
-                    if optional:
-                        args = dict(m.groupdict())
-                        for name, _, __ in re2:
-                            args[name] = []
-                        record = Record(**args)
-                    else:
-                        args = list(m.groups())
-                        for _ in range(len(re2)):
-                            args.append([])
-                        record = Record(*args)
+        for name, attrtext, empty in _iter_tags(xmlfile, [element_name] + list(nested.keys())):
+            if record is not None:
+                if name == element_name:
+                    # end tag (or a start tag if the previous element was not closed)
+                    yield record
+                    record = None
+                elif attrtext is not None:
+                    inner = scanners[name](attrtext)
+                    if inner is not None:
+                        getattr(record, name).append(inner)
+            if name == element_name and attrtext is not None:
+                record = scan(attrtext, *[[] for _ in scanners])
+                if record is not None and empty:
+                    yield record
+                    record = None
     finally:
         if close_source:
             xmlfile.close()
 
 
+def iter_fast_columns(xmlfile, element_name, attrnames, dtypes=None, parent_name=None, parent_attrnames=(),
+                      chunk_size=1 << 20, structured=False, optional=True):
+    """
+    Parses the given attrnames from all elements with element_name into NumPy arrays
+    and yields them in chunks of at most chunk_size rows (at least one, possibly empty chunk),
+    either as a dict of arrays or as a structured array (if "structured=True").
+    If parent_name is given, the parent_attrnames of the enclosing parent element are
+    added as columns as well (prefixed with parent_name and '_' if the element has an
+    attribute of the same name).
+    dtypes maps column names to NumPy dtypes (default float), use object or str for strings.
+    Missing attributes become nan (float), -1 (int), '' (str) or None (object).
+    If you set "optional=False", elements which miss one of the attrnames are skipped.
+    @Note: The scanning is the same as in parse_fast, values are converted chunk-wise by NumPy.
+    @Example: for chunk in iter_fast_columns('fcd.xml', 'vehicle', ['id', 'x', 'y', 'speed'], {'id': object},
+                                             'timestep', ['time']):
+    """
+    import numpy as np
+    if isinstance(attrnames, str):
+        attrnames = [attrnames]
+    if isinstance(parent_attrnames, str):
+        parent_attrnames = [parent_attrnames]
+    attrnames = list(attrnames)
+    parent_attrnames = list(parent_attrnames) if parent_name is not None else []
+    if dtypes is None:
+        dtypes = {}
+    columns = [("%s_%s" % (parent_name, a) if a in attrnames else a) for a in parent_attrnames] + attrnames
+    types = [np.dtype(dtypes.get(c, float)) for c in columns]
+    missing = [{'i': '-1', 'u': '-1', 'U': '', 'S': ''}.get(t.kind) for t in types]
+    reprog = _attribute_pattern(attrnames)
+    parentprog = _attribute_pattern(parent_attrnames) if parent_attrnames else None
+    noParent = (None,) * len(parent_attrnames)
+
+    def convert(rows):
+        arrays = []
+        for col, t, miss in zip(zip(*rows) if rows else [()] * len(columns), types, missing):
+            if miss is not None:
+                col = [miss if v is None else v for v in col]
+            arrays.append(np.array(col, dtype=t))
+        if structured:
+            result = np.empty(len(rows), dtype=[(c, a.dtype) for c, a in zip(columns, arrays)])
+            for c, a in zip(columns, arrays):
+                result[c] = a
+            return result
+        return dict(zip(columns, arrays))
+
+    tagprog = _tag_pattern([element_name] if parent_name is None else [parent_name, element_name])
+    parentValues = noParent
+    rows = []
+    chunks = 0
+    xmlfile, close_source = _check_file_like(xmlfile)
+    try:
+        for block in _iter_blocks(xmlfile):
+            for slash, name, attrtext in tagprog.findall(block):
+                if name == element_name:
+                    if slash:
+                        continue
+                    values = dict(reprog.findall(attrtext))
+                    if not optional and len(values) < len(attrnames):
+                        continue
+                    rows.append(parentValues + tuple(map(values.get, attrnames)))
+                    if len(rows) == chunk_size:
+                        yield convert(rows)
+                        rows = []
+                        chunks += 1
+                elif slash or attrtext[-1:] == "/":
+                    parentValues = noParent
+                elif parentprog is not None:
+                    parentValues = tuple(map(dict(parentprog.findall(attrtext)).get, parent_attrnames))
+        if rows or chunks == 0:
+            yield convert(rows)
+    finally:
+        if close_source:
+            xmlfile.close()
+
+
+def parse_fast_columns(xmlfile, element_name, attrnames, dtypes=None, parent_name=None, parent_attrnames=(),
+                       structured=False, optional=True):
+    """
+    Parses the given attrnames from all elements with element_name into NumPy arrays
+    (see iter_fast_columns) and returns a dict of arrays or a structured array for the whole file.
+    @Example: parse_fast_columns('emission.xml', 'vehicle', ['id', 'CO2', 'fuel'], {'id': object},
+                                 'timestep', ['time'])
+    """
+    import numpy as np
+    chunks = list(iter_fast_columns(xmlfile, element_name, attrnames, dtypes, parent_name, parent_attrnames,
+                                    structured=structured, optional=optional))
+    if structured:
+        return np.concatenate(chunks)
+    return dict([(c, np.concatenate([chunk[c] for chunk in chunks])) for c in chunks[0]])
+
+
+class _FileRange(io.RawIOBase):
+
+    """read-only stream of the byte range [start, end) of a file"""
+
+    def __init__(self, filename, start, end):
+        self._file = open(filename, 'rb')
+        self._file.seek(start)
+        self._left = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._file.read(min(len(buffer), self._left))
+        buffer[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        io.RawIOBase.close(self)
+
+
+def _find_tag(f, start, reprog, block_size=1 << 20):
+    """return the position of the first match of reprog in the file at or after start (or None)"""
+    pos = start
+    while True:
+        f.seek(pos)
+        data = f.read(block_size)
+        m = reprog.search(data)
+        if m is not None:
+            return pos + m.start()
+        if len(data) < block_size:
+            return None
+        # overlap in case the tag is split between blocks
+        pos += len(data) - 64
+
+
+def split_file(filename, parts, split_element="timestep"):
+    """
+    Splits an uncompressed xml file into at most parts byte ranges (start, end) such that
+    every range but the first starts with a split_element tag (which must not be nested).
+    The first range contains the header (including the comments which are not checked for tags).
+    """
+    size = os.path.getsize(filename)
+    tag = re.compile(('<%s(?=[\\s/>])' % re.escape(split_element)).encode())
+    with open(filename, 'rb') as f:
+        # the first tag behind the header comments
+        headerSize = 1 << 16
+        while True:
+            f.seek(0)
+            head = f.read(headerSize)
+            text = re.sub(b"<!--.*?-->", lambda m: b" " * len(m.group()), head, flags=re.DOTALL)
+            m = tag.search(text, 0, text.find(b"<!--") if b"<!--" in text else len(text))
+            if m is not None or len(head) < headerSize:
+                break
+            headerSize *= 2
+        if m is None:
+            return [(0, size)]
+        boundaries = [0]
+        for i in range(1, parts):
+            pos = _find_tag(f, max(m.start(), size * i // parts), tag)
+            if pos is None:
+                break
+            if pos > boundaries[-1]:
+                boundaries.append(pos)
+    return list(zip(boundaries, boundaries[1:] + [size]))
+
+
+def _map_range(filename, start, end, func, args):
+    with io.TextIOWrapper(io.BufferedReader(_FileRange(filename, start, end)), encoding="utf-8-sig") as stream:
+        return func(parse_fast_columns(stream, *args))
+
+
+def map_fast_columns(xmlfile, func, element_name, attrnames, dtypes=None, parent_name=None, parent_attrnames=(),
+                     structured=False, optional=True, workers=None, split_element=None):
+    """
+    Splits an uncompressed xml file (e.g. an FCD or emission output) into byte ranges at
+    split_element tags (default parent_name if given, else element_name), parses each range
+    with parse_fast_columns in a pool of worker processes and applies func to the columns
+    in the worker (e.g. to compute partial aggregates). Returns the list of results in the
+    order of the file (which is the time order for SUMO outputs).
+    func must be picklable (e.g. a module level function), workers defaults to the number of cpus.
+    Compressed files are parsed in a single range.
+    @Example: map_fast_columns('fcd.xml', numpy.sum, 'vehicle', ['speed'], parent_name='timestep')
+    """
+    if split_element is None:
+        split_element = parent_name if parent_name is not None else element_name
+    if workers is None:
+        workers = os.cpu_count() or 1
+    args = (element_name, attrnames, dtypes, parent_name, parent_attrnames, structured, optional)
+    if not isinstance(xmlfile, str) or xmlfile.endswith(".gz") or workers <= 1:
+        return [func(parse_fast_columns(xmlfile, *args))]
+    ranges = split_file(xmlfile, workers, split_element)
+    if len(ranges) == 1:
+        return [_map_range(xmlfile, ranges[0][0], ranges[0][1], func, args)]
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_map_range, xmlfile, start, end, func, args) for start, end in ranges]
+        return [future.result() for future in futures]
+
+
+def parse_fast_columns_parallel(xmlfile, element_name, attrnames, dtypes=None, parent_name=None,
+                                parent_attrnames=(), structured=False, optional=True, workers=None,
+                                split_element=None):
+    """
+    Parses the given attrnames from all elements with element_name into NumPy arrays like
+    parse_fast_columns but distributes byte ranges of the file to worker processes (see map_fast_columns).
+    @Example: parse_fast_columns_parallel('fcd.xml', 'vehicle', ['id', 'x', 'y'], {'id': object},
+                                          'timestep', ['time'])
+    """
+    import numpy as np
+    chunks = map_fast_columns(xmlfile, _IDENTITY, element_name, attrnames, dtypes, parent_name, parent_attrnames,
+                              structured, optional, workers, split_element)
+    if structured:
+        return np.concatenate(chunks)
+    return dict([(c, np.concatenate([chunk[c] for chunk in chunks])) for c in chunks[0]])
+
+
 def buildHeader(script=None, root=None, schemaPath=None, rootAttrs="", options=None, includeXMLDeclaration=False):
     """
     Builds an XML header with schema information and a comment on how the file has been generated
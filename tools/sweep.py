@@ -0,0 +1,174 @@
+"""Run the design points of a sensitivity study in parallel worker processes"""
+
+import csv
+import hashlib
+import json
+import os
+import random
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from sumo_interface import run_sumo_simulation, run_sumo_simulation_live, parse_emission_data
+
+
+ROUTE_FILE = "routes.rou.xml"
+CONFIG_FILE = "sandbox.sumocfg"
+EMISSION_FILE = "emissions_data.xml"
+CHECKPOINT_FILE = "checkpoint.csv"
+
+
+def _absolute_paths(value, base_dir):
+    """make a (comma separated) list of file names relative to base_dir absolute"""
+    return ",".join(os.path.join(base_dir, f.strip()) for f in value.split(","))
+
+def write_sandbox_config(config_file, sandbox_dir):
+    """write a copy of config_file into sandbox_dir that uses the sandbox route and emission files"""
+    tree = ET.parse(config_file)
+    root = tree.getroot()
+    base_dir = os.path.dirname(os.path.abspath(config_file))
+
+    # keep reading the shared inputs (network, additionals) from their original location
+    inputs = root.find("input")
+    if inputs is None:
+        inputs = ET.SubElement(root, "input")
+    for elem in inputs:
+        if elem.tag != "route-files" and elem.get("value"):
+            elem.set("value", _absolute_paths(elem.get("value"), base_dir))
+
+    # route and emission files are private to the sandbox, all other outputs
+    # stay relative and thus land in the sandbox as well
+    route_elem = inputs.find("route-files")
+    if route_elem is None:
+        route_elem = ET.SubElement(inputs, "route-files")
+    route_elem.set("value", ROUTE_FILE)
+
+    processing = root.find("processing")
+    if processing is None:
+        processing = ET.SubElement(root, "processing")
+    emission_elem = processing.find("emission-output")
+    if emission_elem is None:
+        emission_elem = ET.SubElement(processing, "emission-output")
+    emission_elem.set("value", EMISSION_FILE)
+
+    sandbox_config = os.path.join(sandbox_dir, CONFIG_FILE)
+    tree.write(sandbox_config, encoding="utf-8", xml_declaration=True)
+    return sandbox_config
+
+def run_design_point(index, vehicle_proportions, generate_routes, config_file, work_dir, seed=None,
+                     live_emissions=False):
+    """run a single design point in the sandbox of the calling worker process
+
+    generate_routes is called as generate_routes(route_file=..., vehicle_proportions=...)
+    and must be picklable (e.g. a module level function or a functools.partial of one).
+    With live_emissions the emissions are summed while SUMO runs instead of being written to disk.
+    Returns the design point followed by the emission totals or None if SUMO produced no output.
+    """
+    sandbox_dir = os.path.join(work_dir, f"worker_{os.getpid()}")
+    os.makedirs(sandbox_dir, exist_ok=True)
+    write_sandbox_config(config_file, sandbox_dir)
+    emission_file = os.path.join(sandbox_dir, EMISSION_FILE)
+    if os.path.exists(emission_file):
+        os.remove(emission_file)
+
+    # seed per design point so results do not depend on the worker scheduling
+    random.seed(None if seed is None else seed + index)
+    generate_routes(
+        route_file=os.path.join(sandbox_dir, ROUTE_FILE),
+        vehicle_proportions=vehicle_proportions)
+
+    print("Running simulation; ", index)
+    if live_emissions:
+        emissions = run_sumo_simulation_live(config_file=CONFIG_FILE, cwd=sandbox_dir)
+    else:
+        run_sumo_simulation(config_file=CONFIG_FILE, cwd=sandbox_dir)
+        emissions = parse_emission_data(emission_file=emission_file)
+    if emissions is None:
+        return None
+    return np.concatenate((vehicle_proportions, emissions.values[0]))
+
+def design_point_hash(vehicle_proportions, seed, config_file, extra_key=None, input_files=()):
+    """hash the inputs which determine the result of a design point
+
+    extra_key is a JSON serializable value describing the route generation (e.g. the total
+    number of vehicles and the possible routes), the contents of config_file and input_files
+    (e.g. the network the routes are generated for) are hashed as well.
+    """
+    digest = hashlib.sha1()
+    digest.update(json.dumps([float(v) for v in vehicle_proportions]).encode())
+    digest.update(json.dumps(seed).encode())
+    digest.update(json.dumps(extra_key, sort_keys=True).encode())
+    for file_name in [config_file] + list(input_files):
+        with open(file_name, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+def read_checkpoint(checkpoint_file):
+    """read the finished design points as a dict index -> (input hash, result row)
+
+    A last line without newline was cut off by an interrupted run and is removed from the file.
+    """
+    done = {}
+    if not os.path.exists(checkpoint_file):
+        return done
+    with open(checkpoint_file, encoding="utf-8") as file:
+        lines = file.readlines()
+    if lines and not lines[-1].endswith("\n"):
+        lines.pop()
+        with open(checkpoint_file, mode='w', encoding="utf-8") as file:
+            file.writelines(lines)
+    for row in csv.reader(lines):
+        try:
+            done[int(row[0])] = (row[1], np.array(row[2:], dtype=float))
+        except (IndexError, ValueError):
+            continue
+    return done
+
+def run_sweep(design, generate_routes, config_file, results_file,
+              workers=None, work_dir="./sweep", seed=None, live_emissions=False,
+              extra_key=None, input_files=()):
+    """run all rows of design on a pool of worker processes
+
+    Every worker simulates in its own sandbox directory below work_dir. Finished design
+    points are recorded with their index and input hash in a checkpoint file in work_dir,
+    points which are already recorded with the same hash are skipped when the sweep is
+    restarted. The settings of generate_routes are not visible to the sweep, they have to be
+    passed as extra_key and input_files (see design_point_hash) so changing them invalidates
+    the recorded points. Once all points are done the results are written to results_file in design order.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    os.makedirs(work_dir, exist_ok=True)
+    config_file = os.path.abspath(config_file)
+    work_dir = os.path.abspath(work_dir)
+    checkpoint_file = os.path.join(work_dir, CHECKPOINT_FILE)
+
+    hashes = [design_point_hash(vehicle_proportions, seed, config_file, extra_key, input_files)
+              for vehicle_proportions in design]
+    results = {index: row for index, (input_hash, row) in read_checkpoint(checkpoint_file).items()
+               if index < len(hashes) and hashes[index] == input_hash}
+    if results:
+        print(f"Skipping {len(results)} of {len(hashes)} design points with existing results")
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_design_point, index, vehicle_proportions,
+                                   generate_routes, config_file, work_dir, seed, live_emissions): index
+                   for index, vehicle_proportions in enumerate(design) if index not in results}
+
+        for future in as_completed(futures):
+            index = futures[future]
+            combined = future.result()
+            if combined is None:
+                print(f"❌ Design point {index} produced no emission data. Skipping...")
+                continue
+            results[index] = combined
+            with open(checkpoint_file, mode='a', encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow([index, hashes[index]] + list(combined))
+
+    # merge in design order
+    with open(results_file, mode='w', encoding="utf-8") as file:
+        writer = csv.writer(file)
+        for index in sorted(results):
+            writer.writerow(results[index])
@@ -0,0 +1,6 @@
+"""make the modules of the tools directory (sumolib, output_cache, ...) importable from the tests"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
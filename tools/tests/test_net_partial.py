@@ -0,0 +1,62 @@
+"""partially loaded nets with internal edges must stay routable between all of their kept edges"""
+
+import itertools
+import os
+
+import pytest
+
+import sumolib
+
+NET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                   "sumolib", "scenario", "scenarios", "RealWorld", "joined", "joined_buslanes.net.xml")
+
+
+@pytest.fixture(scope="module")
+def full():
+    return sumolib.net.readNet(NET, withInternal=True)
+
+
+def _normalEdges(net):
+    return [e for e in net.getEdges() if e.getFunction() == ""]
+
+
+def _checkRouting(net, full):
+    for e in net.getEdges():
+        for conns in e.getOutgoing().values():
+            for c in conns:
+                if c.getViaLaneID():
+                    assert net.hasEdge(c.getViaLaneID().rsplit("_", 1)[0])
+    edges = _normalEdges(net)
+    assert edges
+    for a, b in itertools.permutations(edges, 2):
+        path, cost = net.getShortestPath(a, b)
+        if path is not None:
+            fullPath = [full.getEdge(e.getID()) for e in path]
+            assert full.getShortestPath(fullPath[0], fullPath[-1])[1] <= cost + 1e-6
+
+
+def test_bbox(full):
+    xmin, ymin, xmax, ymax = full.getBoundary()
+    bbox = (xmin, ymin, (xmin + xmax) / 2, (ymin + ymax) / 2)
+    net = sumolib.net.readNet(NET, withInternal=True, bbox=bbox)
+    # the box cuts through junctions whose internal edges are kept
+    border = []
+    for n in net.getNodes():
+        fullNode = full.getNode(n.getID())
+        if any(not net.hasEdge(e.getID()) for e in fullNode.getIncoming() + fullNode.getOutgoing()):
+            border.append(n.getID())
+    assert any(net.hasEdge(":%s_0" % n) for n in border)
+    _checkRouting(net, full)
+
+
+def test_seed(full):
+    seeds = ["a1", "a10"]
+    net = sumolib.net.readNet(NET, withInternal=True, seedEdges=seeds, seedDepth=3)
+    # the depth only counts normal edges
+    expected = set(seeds)
+    frontier = [full.getEdge(e) for e in seeds]
+    for _ in range(3):
+        frontier = [s for e in frontier for s in e.getOutgoing() if s.getID() not in expected]
+        expected.update(s.getID() for s in frontier)
+    assert set(e.getID() for e in _normalEdges(net)) == expected
+    _checkRouting(net, full)
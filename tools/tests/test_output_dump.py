@@ -0,0 +1,98 @@
+"""readDumpMatrix must deliver the same meandata as the SAX based readDump"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from sumolib.output import dump
+
+MEANDATA = """<?xml version="1.0" encoding="UTF-8"?>
+<!-- generated <edge id="x" speed="99"/> -->
+<meandata>
+    <interval begin="0.00" end="300.00" id="md">
+        <edge id="a" sampledSeconds="10.00" speed="10.50" entered="3"/>
+        <edge id='c' speed='7' entered='1'/>
+        <edge id="b">
+            <lane id="b_0" speed="5.00" entered="2"/>
+            <lane id="b_1" entered="4"/>
+        </edge>
+    </interval>
+    <interval begin="300.00" end="600.00" id="md">
+        <edge id="b">
+            <lane id="b_0" speed="6.00"
+                  entered="1"/>
+        </edge>
+        <edge id="a" speed="12.00" entered="5"/>
+    </interval>
+    <interval begin="600.00" end="900.00" id="md">
+        <edge id="a" speed="8.00" entered="0"/>
+        <edge id="b"><lane id="b_0" speed="4.00" entered="3"/><lane id="b_1" speed="9.00" entered="2"/></edge>
+        <edge id="c" speed="3.00" entered="6"/>
+    </interval>
+</meandata>
+"""
+
+
+@pytest.fixture
+def meandata(tmp_path):
+    path = tmp_path / "meandata.xml"
+    path.write_text(MEANDATA)
+    return str(path)
+
+
+def assertSameDicts(expected, actual):
+    assert len(expected) == len(actual)
+    for exp, act in zip(expected, actual):
+        assert sorted(exp) == sorted(act)
+        for key in exp:
+            assert act[key] == pytest.approx(exp[key])
+
+
+@pytest.mark.parametrize("attrs, edges", [
+    (["speed", "entered"], None),
+    ({"speed": "v", "entered": "n"}, None),
+    (["speed", "entered"], ["a", "b_0", "c", "missing"]),
+    (["speed", "entered"], {"a": "ab", "b_0": "ab", "b_1": "b"}),
+])
+def test_intervals_match_readDump(meandata, attrs, edges):
+    reader = dump.readDump(meandata, attrs, edges)
+    matrix = dump.readDumpMatrix(meandata, attrs, edges)
+    assert list(matrix.getIntervalStarts()) == reader.getIntervalStarts()
+    assert list(matrix.getIntervalEnds()) == [300., 600., 900.]
+    for name in (attrs.values() if isinstance(attrs, dict) else attrs):
+        assert matrix.get(name).shape == (3, len(matrix.edgeIDs))
+        assertSameDicts(reader.get(name), matrix.toDicts(name))
+
+
+def test_edge_index(meandata):
+    matrix = dump.readDumpMatrix(meandata, ["speed"], ["c", "a"])
+    assert matrix.edgeIDs == ["c", "a"]
+    assert matrix.edgeIndex == {"c": 0, "a": 1}
+    assert list(matrix.getEdgeValues("speed", "c")) == [7., 0., 3.]
+
+
+def test_average_join_matches_readDump(meandata):
+    # all edges appear in the last interval, which DumpReader's average join relies on
+    attrs = ["speed", "entered"]
+    reader = dump.readDump(meandata, attrs)
+    matrix = dump.readDumpMatrix(meandata, attrs)
+    reader.join(attrs, "average")
+    matrix.join(attrs, "average")
+    for name in attrs:
+        assert matrix.get(name).shape == (1, len(matrix.edgeIDs))
+        assertSameDicts(reader.get(name), matrix.toDicts(name))
+
+
+def test_sum_join(meandata):
+    attrs = ["speed", "entered"]
+    reader = dump.readDump(meandata, attrs)
+    matrix = dump.readDumpMatrix(meandata, attrs)
+    matrix.join(attrs, "sum")
+    for name in attrs:
+        expected = {}
+        for interval in reader.get(name):
+            for edge, value in interval.items():
+                expected[edge] = expected.get(edge, 0) + value
+        assertSameDicts([expected], matrix.toDicts(name))
+    with pytest.raises(ValueError):
+        matrix.join(attrs, "median")